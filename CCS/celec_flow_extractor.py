@@ -2,9 +2,10 @@
 """
 Extract daily flow values from CELEC monitoring PDFs.
 
-The relevant chart is not consistently embedded as text. This script renders
-or extracts likely chart images, sends them to Windows' offline OCR engine, and
-selects the three Q.med values that satisfy:
+The relevant chart is not consistently embedded as text. This script first
+reads the PDF text layer and, only when the Q.med legend is not there, renders
+or extracts likely chart images and sends them to OCR. It selects the three
+Q.med values that satisfy:
 
     Rio Coca - Derivado CSS = Frente de erosion
 """
@@ -12,8 +13,10 @@ selects the three Q.med values that satisfy:
 from __future__ import annotations
 
 import argparse
+import atexit
 import csv
 import datetime as dt
+import io
 import json
 import math
 import os
@@ -23,7 +26,8 @@ import subprocess
 import sys
 import tempfile
 import unicodedata
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Iterable
 
@@ -36,6 +40,11 @@ try:
 except ImportError:
     pytesseract = None
 
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
 
 DEFAULT_MANIFEST = Path("manifests") / "celec_pdfs_manifest.csv"
 DEFAULT_OUTPUT = Path("outputs") / "celec_daily_flows.csv"
@@ -53,10 +62,11 @@ class PdfJob:
 
 @dataclass(frozen=True)
 class Candidate:
-    path: Path
+    path: Path | None  # PNG copy, only written for --keep-temp or the Windows OCR helper
     pdf_path: Path
     source: str
     priority: int
+    image: Image.Image | None = field(default=None, compare=False, repr=False)
 
 
 @dataclass(frozen=True)
@@ -79,8 +89,9 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
     parser.add_argument("--temp-dir", type=Path, default=DEFAULT_TEMP_DIR)
     parser.add_argument("--ocr-script", type=Path, default=DEFAULT_OCR_SCRIPT,
                         help="Legacy: Windows.Media.Ocr PowerShell script. Used only if --ocr-engine=windows.")
-    parser.add_argument("--ocr-engine", choices=["tesseract", "windows"], default="tesseract",
-                        help="OCR backend. Default 'tesseract' is cross-platform.")
+    parser.add_argument("--ocr-engine", choices=["tesseract", "tesserocr", "windows"], default="tesseract",
+                        help="OCR backend. Default 'tesseract' is cross-platform; 'tesserocr' runs "
+                             "Tesseract in-process with one reused API handle.")
     parser.add_argument("--ocr-lang", default=DEFAULT_OCR_LANG,
                         help="Tesseract language code (default: spa).")
     parser.add_argument("--limit", type=int, default=0)
@@ -89,6 +100,8 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
     parser.add_argument("--only-missing", action="store_true")
     parser.add_argument("--keep-temp", action="store_true")
     parser.add_argument("--progress-every", type=int, default=25)
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="PDFs processed in parallel, one process each (default: 1).")
     return parser.parse_args(argv)
 
 
@@ -151,9 +164,15 @@ def slug(value: str) -> str:
     return re.sub(r"[^A-Za-z0-9]+", "_", ascii_value).strip("_")[:80] or "pdf"
 
 
-def generate_candidates(job: PdfJob, doc: fitz.Document, temp_dir: Path) -> list[Candidate]:
+def generate_candidates(job: PdfJob, doc: fitz.Document, temp_dir: Path | None) -> list[Candidate]:
+    """Page renders, crops and embedded images as in-memory RGB images.
+
+    With a `temp_dir` each image is also saved there as PNG: for debugging with
+    --keep-temp and for the Windows OCR helper, which only reads files.
+    """
     pdf_key = f"{job.report_date.isoformat()}_{slug(job.pdf_path.stem)}"
-    clean_pdf_temp(temp_dir, pdf_key)
+    if temp_dir is not None:
+        clean_pdf_temp(temp_dir, pdf_key)
     candidates: list[Candidate] = []
 
     for page_index, page in enumerate(doc):
@@ -161,24 +180,45 @@ def generate_candidates(job: PdfJob, doc: fitz.Document, temp_dir: Path) -> list
 
         # Full page OCR is a useful fallback for vector charts and old formats.
         rendered = render_page(page, zoom=2.2)
-        page_path = temp_dir / f"{pdf_key}_p{page_index + 1}_full.png"
-        rendered.save(page_path)
-        candidates.append(Candidate(page_path, job.pdf_path, f"page{page_index + 1}:full", 80))
+        candidates.append(
+            make_candidate(
+                rendered, job, f"page{page_index + 1}:full", 80,
+                temp_dir, f"{pdf_key}_p{page_index + 1}_full.png",
+            )
+        )
 
         for name, crop in render_common_crops(rendered):
-            crop_path = temp_dir / f"{pdf_key}_p{page_index + 1}_{name}.png"
-            crop.save(crop_path)
-            candidates.append(Candidate(crop_path, job.pdf_path, f"page{page_index + 1}:{name}", 20))
+            candidates.append(
+                make_candidate(
+                    crop, job, f"page{page_index + 1}:{name}", 20,
+                    temp_dir, f"{pdf_key}_p{page_index + 1}_{name}.png",
+                )
+            )
 
     return candidates
 
 
+def make_candidate(
+    image: Image.Image,
+    job: PdfJob,
+    source: str,
+    priority: int,
+    temp_dir: Path | None,
+    file_name: str,
+) -> Candidate:
+    path = None
+    if temp_dir is not None:
+        path = temp_dir / file_name
+        image.save(path)
+    return Candidate(path, job.pdf_path, source, priority, image)
+
+
 def extract_embedded_image_candidates(
     job: PdfJob,
     doc: fitz.Document,
     page: fitz.Page,
     page_index: int,
-    temp_dir: Path,
+    temp_dir: Path | None,
     pdf_key: str,
 ) -> list[Candidate]:
     candidates: list[Candidate] = []
@@ -198,27 +238,85 @@ def extract_embedded_image_candidates(
         except RuntimeError:
             continue
 
-        raw_path = temp_dir / f"{pdf_key}_p{page_index + 1}_img{image_index}.png"
-        raw_path.write_bytes(extracted["image"])
+        if temp_dir is not None:
+            raw_path = temp_dir / f"{pdf_key}_p{page_index + 1}_img{image_index}.png"
+            raw_path.write_bytes(extracted["image"])
         try:
-            prepared = prepare_ocr_image(Image.open(raw_path).convert("RGB"), max_width=1800)
+            with Image.open(io.BytesIO(extracted["image"])) as raw:
+                prepared = prepare_ocr_image(raw.convert("RGB"), max_width=1800)
         except OSError:
             continue
 
-        prepared_path = temp_dir / f"{pdf_key}_p{page_index + 1}_img{image_index}_ocr.png"
-        prepared.save(prepared_path)
         priority = 5 if likely_chart_size(width, height) else 50
         candidates.append(
-            Candidate(
-                prepared_path,
-                job.pdf_path,
-                f"page{page_index + 1}:image{xref}",
-                priority,
+            make_candidate(
+                prepared, job, f"page{page_index + 1}:image{xref}", priority,
+                temp_dir, f"{pdf_key}_p{page_index + 1}_img{image_index}_ocr.png",
             )
         )
     return candidates
 
 
+def text_layer_result(page: fitz.Page) -> dict:
+    """Page text layer in the same shape as ``ocr_data_result``.
+
+    The text is built once, one line per text-layer line with a blank line between
+    blocks; ``lines`` holds the word boxes. Lines drawn twice at the same spot
+    (overprinted legends) are kept only once.
+    """
+    grouped: list[dict] = []
+    current_key = None
+    for x0, y0, x1, y1, word, block_no, line_no, _ in page.get_text("words"):
+        if (block_no, line_no) != current_key:
+            current_key = (block_no, line_no)
+            grouped.append({"block": block_no, "words": [], "y": round(y0)})
+        grouped[-1]["words"].append((x0, y0, x1, y1, word))
+
+    seen: set[tuple[str, int]] = set()
+    text_lines: list[str] = []
+    words_data: list[dict] = []
+    current_block = None
+    for line in grouped:
+        line_text = " ".join(word for *_, word in line["words"])
+        if (line_text, line["y"]) in seen:
+            continue
+        seen.add((line_text, line["y"]))
+        if current_block is not None and line["block"] != current_block:
+            text_lines.append("")
+        text_lines.append(line_text)
+        current_block = line["block"]
+        words_data.extend(
+            {
+                "text": word,
+                "x": round(x0, 2),
+                "y": round(y0, 2),
+                "w": round(x1 - x0, 2),
+                "h": round(y1 - y0, 2),
+                "conf": 100.0,
+            }
+            for x0, y0, x1, y1, word in line["words"]
+        )
+    return {
+        "path": "",
+        "ok": bool(words_data),
+        "text": "\n".join(text_lines) + ("\n" if text_lines else ""),
+        "lines": words_data,
+    }
+
+
+def text_layer_triples(job: PdfJob, doc: fitz.Document, front_text_value: float | None) -> list[FlowTriple]:
+    triples: list[FlowTriple] = []
+    for page_index, page in enumerate(doc):
+        result = text_layer_result(page)
+        if not result["ok"]:
+            continue
+        candidate = Candidate(None, job.pdf_path, f"page{page_index + 1}:text_layer", 0)
+        triple = parse_ocr_result(result, candidate, front_text_value)
+        if triple is not None:
+            triples.append(triple)
+    return triples
+
+
 def likely_chart_size(width: int, height: int) -> bool:
     ratio = width / max(1, height)
     return 1.4 <= ratio <= 3.8 and width >= 500 and height >= 250
@@ -263,19 +361,30 @@ def prepare_ocr_image(image: Image.Image, max_width: int) -> Image.Image:
 
 
 def run_ocr_batch(
-    image_paths: list[Path],
+    candidates: list[Candidate],
     engine: str = "tesseract",
     ocr_script: Path | None = None,
     lang: str = DEFAULT_OCR_LANG,
 ) -> list[dict]:
-    if not image_paths:
+    """One OCR result per candidate, in the same order."""
+    if not candidates:
         return []
     if engine == "windows":
-        return _run_ocr_batch_windows(ocr_script, image_paths)
-    return _run_ocr_batch_tesseract(image_paths, lang=lang)
-
-
-def _run_ocr_batch_tesseract(image_paths: list[Path], lang: str) -> list[dict]:
+        results = _run_ocr_batch_windows(ocr_script, [candidate.path for candidate in candidates])
+        by_path = {
+            str(Path(result["path"]).resolve()): result
+            for result in results
+            if isinstance(result.get("path"), str)
+        }
+        missing = {"ok": False, "text": "", "lines": []}
+        return [by_path.get(str(candidate.path.resolve()), missing) for candidate in candidates]
+    images = [candidate.image for candidate in candidates]
+    if engine == "tesserocr":
+        return _run_ocr_batch_tesserocr(images, lang=lang)
+    return _run_ocr_batch_tesseract(images, lang=lang)
+
+
+def _run_ocr_batch_tesseract(images: list[Image.Image], lang: str) -> list[dict]:
     if pytesseract is None:
         raise RuntimeError(
             "pytesseract no está instalado. Ejecuta: pip install pytesseract\n"
@@ -283,46 +392,78 @@ def _run_ocr_batch_tesseract(image_paths: list[Path], lang: str) -> list[dict]:
         )
     results: list[dict] = []
     config = "--psm 6"
-    for image_path in image_paths:
+    for img in images:
         try:
-            with Image.open(image_path) as img:
-                img = img.convert("RGB")
-                text = pytesseract.image_to_string(img, lang=lang, config=config)
-                lines_data = []
-                try:
-                    data = pytesseract.image_to_data(
-                        img, lang=lang, config=config,
-                        output_type=pytesseract.Output.DICT,
-                    )
-                    for i in range(len(data.get("text", []))):
-                        line_text = (data["text"][i] or "").strip()
-                        if not line_text:
-                            continue
-                        try:
-                            conf = float(data["conf"][i])
-                        except (ValueError, TypeError):
-                            conf = -1.0
-                        if conf < 0:
-                            continue
-                        lines_data.append({
-                            "text": line_text,
-                            "x": int(data["left"][i]),
-                            "y": int(data["top"][i]),
-                            "w": int(data["width"][i]),
-                            "h": int(data["height"][i]),
-                            "conf": conf,
-                        })
-                except Exception:
-                    pass
+            # A single recognition per image: the plain text is rebuilt from the word boxes.
+            data = pytesseract.image_to_data(
+                img, lang=lang, config=config,
+                output_type=pytesseract.Output.DICT,
+            )
+            results.append(ocr_data_result(data))
+        except Exception as exc:
             results.append({
-                "path": str(image_path.resolve()),
-                "ok": True,
-                "text": text,
-                "lines": lines_data,
+                "ok": False,
+                "text": "",
+                "lines": [],
+                "error": str(exc),
             })
+    return results
+
+
+_tesserocr_apis: dict = {}
+
+
+def _tesserocr_api(lang: str):
+    """One PyTessBaseAPI per language and process, reused for every image."""
+    api = _tesserocr_apis.get(lang)
+    if api is None:
+        api = tesserocr.PyTessBaseAPI(lang=lang, psm=tesserocr.PSM.SINGLE_BLOCK)
+        atexit.register(api.End)
+        _tesserocr_apis[lang] = api
+    return api
+
+
+def _run_ocr_batch_tesserocr(images: list[Image.Image], lang: str) -> list[dict]:
+    if tesserocr is None:
+        raise RuntimeError("tesserocr no está instalado. Ejecuta: pip install tesserocr")
+    api = _tesserocr_api(lang)
+    level = tesserocr.RIL.WORD
+    results: list[dict] = []
+    for img in images:
+        try:
+            api.SetImage(img)
+            api.Recognize()
+            # Same columns as pytesseract.image_to_data, from the result iterator.
+            data: dict[str, list] = {
+                key: [] for key in ("block_num", "par_num", "line_num", "text", "conf",
+                                    "left", "top", "width", "height")
+            }
+            iterator = api.GetIterator()
+            words = tesserocr.iterate_level(iterator, level) if iterator is not None else ()
+            block = par = line = 0
+            for word in words:
+                box = word.BoundingBox(level)
+                if box is None:
+                    continue
+                if word.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+                    block, par, line = block + 1, 0, 0
+                if word.IsAtBeginningOf(tesserocr.RIL.PARA):
+                    par, line = par + 1, 0
+                if word.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                    line += 1
+                x1, y1, x2, y2 = box
+                data["block_num"].append(block)
+                data["par_num"].append(par)
+                data["line_num"].append(line)
+                data["text"].append(word.GetUTF8Text(level))
+                data["conf"].append(word.Confidence(level))
+                data["left"].append(x1)
+                data["top"].append(y1)
+                data["width"].append(x2 - x1)
+                data["height"].append(y2 - y1)
+            results.append(ocr_data_result(data))
         except Exception as exc:
             results.append({
-                "path": str(image_path.resolve()),
                 "ok": False,
                 "text": "",
                 "lines": [],
@@ -331,6 +472,51 @@ def _run_ocr_batch_tesseract(image_paths: list[Path], lang: str) -> list[dict]:
     return results
 
 
+def ocr_data_result(data: dict) -> dict:
+    """OCR result from image_to_data columns.
+
+    The text is rebuilt the way Tesseract lays it out: words of a line joined by
+    spaces, lines by newlines, and a blank line between paragraphs and blocks.
+    """
+    lines_data = []
+    text_lines: list[str] = []
+    current_line = None
+    current_par = None
+    for i in range(len(data.get("text", []))):
+        line_text = (data["text"][i] or "").strip()
+        if not line_text:
+            continue
+        par_key = (data["block_num"][i], data["par_num"][i])
+        line_key = (*par_key, data["line_num"][i])
+        if line_key != current_line:
+            if current_par is not None and par_key != current_par:
+                text_lines.append("")
+            text_lines.append(line_text)
+            current_line, current_par = line_key, par_key
+        else:
+            text_lines[-1] += " " + line_text
+
+        try:
+            conf = float(data["conf"][i])
+        except (ValueError, TypeError):
+            conf = -1.0
+        if conf < 0:
+            continue
+        lines_data.append({
+            "text": line_text,
+            "x": int(data["left"][i]),
+            "y": int(data["top"][i]),
+            "w": int(data["width"][i]),
+            "h": int(data["height"][i]),
+            "conf": conf,
+        })
+    return {
+        "ok": True,
+        "text": "\n".join(text_lines) + ("\n" if text_lines else ""),
+        "lines": lines_data,
+    }
+
+
 def _run_ocr_batch_windows(ocr_script: Path | None, image_paths: list[Path]) -> list[dict]:
     if ocr_script is None or not ocr_script.exists():
         raise RuntimeError(f"OCR script no encontrado: {ocr_script}")
@@ -366,10 +552,11 @@ def _run_ocr_batch_windows(ocr_script: Path | None, image_paths: list[Path]) ->
 
 
 def parse_ocr_result(result: dict, candidate: Candidate, front_text_value: float | None) -> FlowTriple | None:
-    text = result.get("text", "") or ""
-    lines = result.get("lines") or []
-    line_text = "\n".join(str(line.get("text", "")) for line in lines)
-    combined = text + "\n" + line_text
+    # ``text`` already holds every word in reading order; the boxes in ``lines``
+    # are only a fallback for engines that return no full text.
+    combined = result.get("text", "") or ""
+    if not combined.strip():
+        combined = "\n".join(str(line.get("text", "")) for line in result.get("lines") or [])
 
     if not looks_like_qmed_context(combined):
         return None
@@ -413,10 +600,9 @@ def estimate_plot_triple(candidate: Candidate, front_text_value: float | None) -
     ):
         return None
 
-    try:
-        image = np.asarray(Image.open(candidate.path).convert("RGB"))
-    except OSError:
+    if candidate.image is None:
         return None
+    image = np.asarray(candidate.image)
 
     height, width = image.shape[:2]
     if height < 250 or width < 500:
@@ -707,24 +893,26 @@ def write_output(path: Path, rows: list[dict[str, str]]) -> None:
 def process_job(job: PdfJob, args: argparse.Namespace) -> dict[str, str]:
     doc = fitz.open(job.pdf_path)
     front_text_value = extract_text_front_value(doc)
-    candidates = sorted(generate_candidates(job, doc, args.temp_dir), key=lambda item: item.priority)
 
-    triples: list[FlowTriple] = []
-    candidate_by_path = {str(candidate.path.resolve()): candidate for candidate in candidates}
+    # Many reports carry the Q.med legend as real text: no rendering or OCR needed.
+    triples = text_layer_triples(job, doc, front_text_value)
+    best = choose_best(triples, front_text_value)
+    if best is not None and confident_triple(best, front_text_value):
+        return flow_row(job, best, front_text_value)
+
+    # Images stay in memory; PNGs are written only to debug or for the Windows helper.
+    write_dir = args.temp_dir if args.keep_temp or args.ocr_engine == "windows" else None
+    candidates = sorted(generate_candidates(job, doc, write_dir), key=lambda item: item.priority)
     for batch_start in range(0, len(candidates), 8):
         batch = candidates[batch_start : batch_start + 8]
         ocr_results = run_ocr_batch(
-            [candidate.path for candidate in batch],
+            batch,
             engine=args.ocr_engine,
             ocr_script=args.ocr_script,
             lang=args.ocr_lang,
         )
-        for result in ocr_results:
-            result_path = result.get("path")
-            if not isinstance(result_path, str):
-                continue
-            candidate = candidate_by_path.get(str(Path(result_path).resolve()))
-            if candidate is None or not result.get("ok"):
+        for candidate, result in zip(batch, ocr_results):
+            if not result.get("ok"):
                 continue
             triple = parse_ocr_result(result, candidate, front_text_value)
             if triple is not None:
@@ -741,7 +929,10 @@ def process_job(job: PdfJob, args: argparse.Namespace) -> dict[str, str]:
             if (triple := estimate_plot_triple(candidate, front_text_value)) is not None
         ]
         best = choose_best(plot_triples, front_text_value)
+    return flow_row(job, best, front_text_value)
 
+
+def flow_row(job: PdfJob, best: FlowTriple | None, front_text_value: float | None) -> dict[str, str]:
     if best is None:
         status = "missing"
         best = FlowTriple(math.nan, math.nan, math.nan, math.nan, "", "", False)
@@ -774,6 +965,42 @@ def process_job(job: PdfJob, args: argparse.Namespace) -> dict[str, str]:
     }
 
 
+def process_job_safe(job: PdfJob, args: argparse.Namespace) -> dict[str, str]:
+    try:
+        return process_job(job, args)
+    except Exception as exc:
+        return {
+            "fecha": job.report_date.isoformat(),
+            "caudal_rio_coca_m3s": "",
+            "caudal_derivado_css_m3s": "",
+            "caudal_frente_erosion_m3s": "",
+            "frente_erosion_texto_m3s": "",
+            "balance_error_m3s": "",
+            "status": f"error: {exc}",
+            "source": "",
+            "pdf_path": str(job.pdf_path),
+            "remote_path": job.remote_path,
+            "ocr_text": "",
+        }
+
+
+_worker_args: argparse.Namespace | None = None
+
+
+def init_worker(args: argparse.Namespace) -> None:
+    """Give each pool process its own temp dir so clean_pdf_temp never sees another worker's files."""
+    global _worker_args
+    # One Tesseract thread per process; the pool already uses the cores.
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    _worker_args = argparse.Namespace(**vars(args))
+    _worker_args.temp_dir = args.temp_dir / f"worker_{os.getpid()}"
+    prepare_temp_dir(_worker_args.temp_dir)
+
+
+def process_job_in_worker(job: PdfJob) -> dict[str, str]:
+    return process_job_safe(job, _worker_args)
+
+
 def run(argv: list[str]) -> int:
     args = parse_args(argv)
     if args.ocr_engine == "windows":
@@ -784,6 +1011,10 @@ def run(argv: list[str]) -> int:
         if pytesseract is None:
             print("pytesseract no está instalado. Ejecuta: pip install pytesseract", file=sys.stderr)
             return 2
+    elif args.ocr_engine == "tesserocr":
+        if tesserocr is None:
+            print("tesserocr no está instalado. Ejecuta: pip install tesserocr", file=sys.stderr)
+            return 2
 
     jobs = read_manifest(args.manifest)
     if args.since:
@@ -806,32 +1037,32 @@ def run(argv: list[str]) -> int:
             existing_rows = list(csv.DictReader(file))
 
     print(f"Processing {len(jobs)} PDFs...")
-    for index, job in enumerate(jobs, start=1):
-        try:
-            row = process_job(job, args)
-        except Exception as exc:
-            row = {
-                "fecha": job.report_date.isoformat(),
-                "caudal_rio_coca_m3s": "",
-                "caudal_derivado_css_m3s": "",
-                "caudal_frente_erosion_m3s": "",
-                "frente_erosion_texto_m3s": "",
-                "balance_error_m3s": "",
-                "status": f"error: {exc}",
-                "source": "",
-                "pdf_path": str(job.pdf_path),
-                "remote_path": job.remote_path,
-                "ocr_text": "",
-            }
-        rows.append(row)
-
-        if index == 1 or index % args.progress_every == 0 or index == len(jobs):
-            ok_count = sum(1 for item in rows if item["status"] == "ok")
-            review_count = sum(1 for item in rows if item["status"].startswith("review"))
-            print(
-                f"[{index}/{len(jobs)}] ok={ok_count} review={review_count} "
-                f"latest={row['fecha']} status={row['status']}"
-            )
+    pool = None
+    if args.jobs > 1 and len(jobs) > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=min(args.jobs, len(jobs)),
+            initializer=init_worker,
+            initargs=(args,),
+        )
+        # map() keeps the manifest order, so rows and progress stream by report date.
+        results = pool.map(process_job_in_worker, jobs)
+    else:
+        results = (process_job_safe(job, args) for job in jobs)
+
+    try:
+        for index, row in enumerate(results, start=1):
+            rows.append(row)
+
+            if index == 1 or index % args.progress_every == 0 or index == len(jobs):
+                ok_count = sum(1 for item in rows if item["status"] == "ok")
+                review_count = sum(1 for item in rows if item["status"].startswith("review"))
+                print(
+                    f"[{index}/{len(jobs)}] ok={ok_count} review={review_count} "
+                    f"latest={row['fecha']} status={row['status']}"
+                )
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
 
     final_rows = existing_rows + rows
     final_rows = sorted(final_rows, key=lambda row: (row["fecha"], row["pdf_path"]))
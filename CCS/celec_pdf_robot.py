@@ -12,22 +12,31 @@ import argparse
 import base64
 import csv
 import datetime as dt
+import hashlib
 import http.cookiejar
+import json
 import os
 import re
 import sys
+import tempfile
+import threading
 import time
 import urllib.error
 import urllib.parse
 import urllib.request
 import xml.etree.ElementTree as ET
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
 
 
 DEFAULT_SHARE_URL = "https://celecloud.celec.gob.ec/s/fH4f7pr5y9XBsxn"
 DEFAULT_OUTPUT_DIR = Path("downloads") / "celec_pdfs"
 DEFAULT_MANIFEST = Path("manifests") / "celec_pdfs_manifest.csv"
+DEFAULT_LISTING_CACHE = Path("manifests") / "celec_listing_cache.json"
+DEFAULT_SYNC_STATE = Path("manifests") / "celec_sync_state.json"
+LISTING_CACHE_VERSION = 1
+SYNC_STATE_VERSION = 1
 
 DAV_NS = "DAV:"
 OC_NS = "http://owncloud.org/ns"
@@ -105,34 +114,73 @@ class CelecNextcloudClient:
         current = normalize_remote_dir(remote_dir)
         return [item for item in items if item.path.rstrip("/") != current.rstrip("/")]
 
-    def download_file(self, remote_path: str, target_path: Path, size: int) -> str:
-        if target_path.exists() and size and target_path.stat().st_size == size:
-            return "skipped"
+    def download_file(
+        self, remote_path: str, target_path: Path, size: int, resume_etag: str = ""
+    ) -> tuple[str, str]:
+        """Download through a .part file and return (status, sha256 of the content).
 
+        With `resume_etag` an existing .part is continued with `Range` guarded by
+        `If-Range`: the server sends only the missing bytes (206) while the file
+        still has that ETag, and the whole file (200) if it changed since.
+        """
         target_path.parent.mkdir(parents=True, exist_ok=True)
         partial_path = target_path.with_name(target_path.name + ".part")
-        if partial_path.exists():
-            partial_path.unlink()
+        offset = partial_path.stat().st_size if resume_etag and partial_path.exists() else 0
+        if size and offset >= size:
+            offset = 0
 
         request = self._request(self._webdav_url(remote_path, directory=False))
-        downloaded = 0
-        with self.opener.open(request, timeout=self.timeout) as response:
-            with partial_path.open("wb") as file:
-                while True:
-                    chunk = response.read(1024 * 1024)
-                    if not chunk:
-                        break
-                    file.write(chunk)
-                    downloaded += len(chunk)
+        if offset:
+            request.add_header("Range", f"bytes={offset}-")
+            request.add_header("If-Range", resume_etag)
+        try:
+            response = self.opener.open(request, timeout=self.timeout)
+        except urllib.error.HTTPError as exc:
+            if exc.code != 416 or not offset:
+                raise
+            partial_path.unlink(missing_ok=True)
+            return self.download_file(remote_path, target_path, size)
+
+        digest = hashlib.sha256()
+        with response:
+            # A 206 that does not start at `offset` cannot be appended to the .part
+            misaligned = (
+                response.status == 206
+                and content_range_start(response.headers.get("Content-Range")) != offset
+            )
+            if not misaligned:
+                resumed = offset > 0 and response.status == 206
+                if resumed:
+                    with partial_path.open("rb") as file:
+                        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                            digest.update(chunk)
+                downloaded = offset if resumed else 0
+                with partial_path.open("ab" if resumed else "wb") as file:
+                    while True:
+                        chunk = response.read(1024 * 1024)
+                        if not chunk:
+                            break
+                        file.write(chunk)
+                        digest.update(chunk)
+                        downloaded += len(chunk)
+
+        if misaligned:
+            # Drop the .part and download the whole file again, without Range.
+            partial_path.unlink(missing_ok=True)
+            if not offset:
+                raise IOError(f"Unexpected partial response for {remote_path}")
+            return self.download_file(remote_path, target_path, size)
 
         if size and downloaded != size:
-            partial_path.unlink(missing_ok=True)
+            # A short .part is kept so the next attempt can resume it.
+            if downloaded > size:
+                partial_path.unlink(missing_ok=True)
             raise IOError(
                 f"Incomplete download for {remote_path}: {downloaded} of {size} bytes"
             )
 
         os.replace(partial_path, target_path)
-        return "downloaded"
+        return ("resumed" if resumed else "downloaded"), digest.hexdigest()
 
     def _request(
         self, url: str, data: bytes | None = None, method: str | None = None
@@ -226,6 +274,31 @@ def href_to_remote_path(href: str) -> str | None:
     return decoded_path.split(marker, 1)[1].strip("/")
 
 
+def content_range_start(header: str | None) -> int | None:
+    match = re.match(r"bytes\s+(\d+)-\d+/", header or "")
+    return int(match.group(1)) if match else None
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_json_atomic(path: Path, payload: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(payload, file, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
 def extract_report_date(path: str) -> dt.date | None:
     name = Path(path).name
     candidates = [name, path]
@@ -271,25 +344,188 @@ def local_path_for(output_dir: Path, remote_path: str) -> Path:
     return output_dir.joinpath(*(sanitize_part(part) for part in remote_path.split("/")))
 
 
-def discover_pdfs(client: CelecNextcloudClient, since: dt.date) -> list[RemoteItem]:
-    stack = [""]
-    pdfs: list[RemoteItem] = []
+class ListingCache:
+    """Directory listings keyed by remote path and validated by the directory ETag.
+
+    Nextcloud changes a folder's ETag whenever anything below it changes, so a
+    listing whose ETag still matches the one reported by its parent can be reused
+    without another PROPFIND, and so can every listing beneath it.
+    """
+
+    def __init__(self, path: Path | None) -> None:
+        self.path = path
+        self.dirs: dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+        if path is not None and path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == LISTING_CACHE_VERSION:
+                self.dirs = data.get("dirs", {})
+
+    def get(self, remote_dir: str, etag: str) -> list[RemoteItem] | None:
+        entry = self.dirs.get(remote_dir)
+        if not etag or entry is None or entry.get("etag") != etag:
+            return None
+        return [
+            RemoteItem(**fields, report_date=extract_report_date(fields["path"]))
+            for fields in entry["items"]
+        ]
+
+    def put(self, remote_dir: str, etag: str, items: list[RemoteItem]) -> None:
+        self.dirs[remote_dir] = {
+            "etag": etag,
+            "items": [
+                {key: value for key, value in asdict(item).items() if key != "report_date"}
+                for item in items
+            ],
+        }
+
+    def save(self) -> None:
+        if self.path is not None:
+            write_json_atomic(
+                self.path, {"version": LISTING_CACHE_VERSION, "dirs": self.dirs}
+            )
 
-    while stack:
-        current_dir = stack.pop()
-        for item in client.list_dir(current_dir):
-            if item.is_dir:
-                year = leading_year(item.path)
-                if year is None or year >= since.year:
-                    stack.append(item.path)
-                continue
 
-            if should_download_pdf(item, since):
-                pdfs.append(item)
+class SyncState:
+    """What was last downloaded for each remote path: etag, size, modified, sha256.
+
+    A file is skipped when the listing still reports the recorded ETag and the
+    local copy has the recorded size. `partial_etag` remembers which version an
+    unfinished .part belongs to, so the next attempt can resume it.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.files: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == SYNC_STATE_VERSION:
+                self.files = data.get("files", {})
+
+    def get(self, remote_path: str) -> dict | None:
+        with self._lock:
+            return self.files.get(remote_path)
+
+    def set(self, remote_path: str, entry: dict) -> None:
+        with self._lock:
+            self.files[remote_path] = entry
+
+    def save(self) -> None:
+        with self._lock:
+            payload = {"version": SYNC_STATE_VERSION, "files": dict(self.files)}
+        write_json_atomic(self.path, payload)
+
+
+def discover_pdfs(
+    client: CelecNextcloudClient,
+    since: dt.date,
+    workers: int = 1,
+    cache: ListingCache | None = None,
+) -> list[RemoteItem]:
+    cache = cache or ListingCache(None)
+    pdfs: list[RemoteItem] = []
+    # Breadth-first: every folder of one level is listed in a single concurrent
+    # batch. The share root has no parent ETag to compare, so it is always listed.
+    level: list[tuple[str, str]] = [("", "")]
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while level:
+            listings: dict[str, list[RemoteItem]] = {}
+            pending: list[tuple[str, str]] = []
+            for remote_dir, etag in level:
+                cached = cache.get(remote_dir, etag)
+                if cached is None:
+                    pending.append((remote_dir, etag))
+                else:
+                    listings[remote_dir] = cached
+            cache.hits += len(listings)
+            cache.misses += len(pending)
+
+            fetched = pool.map(client.list_dir, [remote_dir for remote_dir, _ in pending])
+            for (remote_dir, etag), items in zip(pending, fetched):
+                listings[remote_dir] = items
+                if etag:
+                    cache.put(remote_dir, etag, items)
+
+            next_level: list[tuple[str, str]] = []
+            for remote_dir, _ in level:
+                for item in listings[remote_dir]:
+                    if item.is_dir:
+                        year = leading_year(item.path)
+                        if year is None or year >= since.year:
+                            next_level.append((item.path, item.etag))
+                        continue
+
+                    if should_download_pdf(item, since):
+                        pdfs.append(item)
+            level = next_level
 
     return sorted(pdfs, key=lambda item: (item.report_date or dt.date.min, item.path))
 
 
+def synced_entry(item: RemoteItem, local_path: Path, sha256: str) -> dict:
+    return {
+        "etag": item.etag,
+        "size": local_path.stat().st_size,
+        "modified": item.modified,
+        "sha256": sha256,
+        "local_path": str(local_path),
+    }
+
+
+def sync_file(
+    client: CelecNextcloudClient, item: RemoteItem, local_path: Path, state: SyncState
+) -> str:
+    entry = state.get(item.path)
+    if local_path.exists():
+        local_size = local_path.stat().st_size
+        if (
+            entry
+            and item.etag
+            and entry.get("etag") == item.etag
+            and entry.get("size") == local_size
+        ):
+            return "skipped"
+        if entry is None and item.size and local_size == item.size:
+            # Downloaded before the sync state existed: adopt the local copy.
+            state.set(item.path, synced_entry(item, local_path, file_sha256(local_path)))
+            return "skipped"
+
+    resume_etag = (entry or {}).get("partial_etag", "")
+    state.set(item.path, {**(entry or {}), "partial_etag": item.etag})
+    status, sha256 = client.download_file(item.path, local_path, item.size, resume_etag)
+    state.set(item.path, synced_entry(item, local_path, sha256))
+    return status
+
+
+def download_with_retries(
+    client: CelecNextcloudClient,
+    item: RemoteItem,
+    local_path: Path,
+    state: SyncState,
+    retries: int,
+    label: str,
+) -> str:
+    for attempt in range(1, retries + 1):
+        try:
+            return sync_file(client, item, local_path, state)
+        except (OSError, urllib.error.URLError, TimeoutError) as exc:
+            if attempt == retries:
+                return f"error: {exc}"
+            wait = min(30, 2**attempt)
+            print(f"{label} retry {attempt}/{retries} after error: {exc}")
+            time.sleep(wait)
+    return "error: no attempts"
+
+
 def write_manifest(manifest_path: Path, rows: list[dict[str, str]]) -> None:
     manifest_path.parent.mkdir(parents=True, exist_ok=True)
     fieldnames = [
@@ -318,6 +554,27 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
     parser.add_argument("--dry-run", action="store_true", help="List only")
     parser.add_argument("--limit", type=int, default=0, help="Download at most N files")
     parser.add_argument("--delay", type=float, default=0.0, help="Seconds between files")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Concurrent downloads and directory listings (default: 1)",
+    )
+    parser.add_argument(
+        "--listing-cache",
+        type=Path,
+        default=DEFAULT_LISTING_CACHE,
+        help="JSON cache of folder listings keyed by ETag",
+    )
+    parser.add_argument(
+        "--no-listing-cache", action="store_true", help="List every folder again"
+    )
+    parser.add_argument(
+        "--sync-state",
+        type=Path,
+        default=DEFAULT_SYNC_STATE,
+        help="JSON record of downloaded files (etag, size, modified, sha256)",
+    )
     parser.add_argument("--retries", type=int, default=3)
     parser.add_argument("--timeout", type=int, default=120)
     return parser.parse_args(argv)
@@ -332,7 +589,10 @@ def run(argv: list[str]) -> int:
     client.open_share()
 
     print(f"Listing PDF reports since {since.isoformat()}...")
-    pdfs = discover_pdfs(client, since)
+    cache = ListingCache(None if args.no_listing_cache else args.listing_cache)
+    pdfs = discover_pdfs(client, since, workers=args.workers, cache=cache)
+    cache.save()
+    print(f"Folders listed: {cache.misses}, reused from cache: {cache.hits}")
     if args.limit:
         pdfs = pdfs[: args.limit]
 
@@ -342,42 +602,50 @@ def run(argv: list[str]) -> int:
     if latest:
         print(f"Latest available report date: {latest.isoformat()}")
 
-    rows: list[dict[str, str]] = []
-    for index, item in enumerate(pdfs, start=1):
-        local_path = local_path_for(args.output_dir, item.path)
-        status = "dry-run"
+    state = SyncState(args.sync_state)
 
-        if not args.dry_run:
-            for attempt in range(1, args.retries + 1):
-                try:
-                    status = client.download_file(item.path, local_path, item.size)
-                    break
-                except (OSError, urllib.error.URLError, TimeoutError) as exc:
-                    if attempt == args.retries:
-                        status = f"error: {exc}"
-                    else:
-                        wait = min(30, 2**attempt)
-                        print(
-                            f"[{index}/{len(pdfs)}] retry {attempt}/{args.retries} "
-                            f"after error: {exc}"
-                        )
-                        time.sleep(wait)
-
-            if args.delay:
-                time.sleep(args.delay)
-
-        print(f"[{index}/{len(pdfs)}] {status}: {item.path}")
-        rows.append(
-            {
-                "report_date": item.report_date.isoformat() if item.report_date else "",
-                "remote_path": item.path,
-                "local_path": str(local_path),
-                "size_bytes": str(item.size),
-                "modified": item.modified,
-                "etag": item.etag,
-                "status": status,
-            }
+    def fetch(indexed: tuple[int, RemoteItem]) -> tuple[Path, str]:
+        index, item = indexed
+        local_path = local_path_for(args.output_dir, item.path)
+        if args.dry_run:
+            return local_path, "dry-run"
+        status = download_with_retries(
+            client, item, local_path, state, args.retries, label=f"[{index}/{len(pdfs)}]"
         )
+        if args.delay:
+            time.sleep(args.delay)
+        return local_path, status
+
+    # The opener and its CookieJar are safe to share between threads, and the
+    # request token is read-only after open_share(). map() yields in input
+    # order, so progress lines and manifest rows stay deterministic.
+    # The sync state is saved even if the run is interrupted, so partial
+    # downloads keep the ETag they belong to and can be resumed next time.
+    workers = max(1, args.workers)
+    rows: list[dict[str, str]] = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(fetch, enumerate(pdfs, start=1))
+            for index, (item, (local_path, status)) in enumerate(
+                zip(pdfs, results), start=1
+            ):
+                print(f"[{index}/{len(pdfs)}] {status}: {item.path}")
+                rows.append(
+                    {
+                        "report_date": (
+                            item.report_date.isoformat() if item.report_date else ""
+                        ),
+                        "remote_path": item.path,
+                        "local_path": str(local_path),
+                        "size_bytes": str(item.size),
+                        "modified": item.modified,
+                        "etag": item.etag,
+                        "status": status,
+                    }
+                )
+    finally:
+        if not args.dry_run:
+            state.save()
 
     write_manifest(args.manifest, rows)
     print(f"Manifest written: {args.manifest}")
@@ -1,30 +1,328 @@
 #!/usr/bin/env python3
-"""Servidor local para el dashboard de caudales CELEC."""
+"""Servidor local para el dashboard de caudales CELEC.
+
+- Multihilo: un cliente lento no bloquea al resto (varios analistas a la vez).
+- Caché en memoria de los archivos servidos, invalidada por mtime/tamaño.
+- Sirve las variantes precomprimidas (`archivo.br` / `archivo.gz`, generadas por
+  scripts/build_datasets.py) según `Accept-Encoding`, con ETag fuerte y cache larga
+  para las URLs versionadas (`?v=<hash>`). Una variante se usa solo si descomprimida
+  coincide con el original (verificado una vez por versión de ambos archivos; las
+  fechas de modificación no sirven tras un `git clone`).
+- Responde 304 a `If-None-Match` / `If-Modified-Since` y soporta `Range` (206/416).
+- Una línea de log por consulta con estado, bytes y tiempo.
+
+Uso:
+    python serve.py                          # CCS/outputs/dashboard.html
+    python serve.py --dir ../../public --page index.html
+"""
+import argparse
+import gzip
+import hashlib
 import http.server
-import socketserver
-import webbrowser
+import io
 import os
 import sys
+import threading
+import time
+import webbrowser
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 PORT = 8765
 DIR = os.path.dirname(os.path.abspath(__file__))
 
+# Preferencia del servidor si el cliente acepta varias
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDATE = "no-cache"
+# Archivos más grandes que esto se leen de disco en cada consulta (solo se cachea el ETag)
+CACHE_MAX_FILE = 16 * 1024 * 1024
+
+
+def accepted_encodings(header):
+    """Codificaciones con q > 0 de un header Accept-Encoding."""
+    accepted = set()
+    for part in (header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if token and q > 0:
+            accepted.add(token.lower())
+    return accepted
+
+
+def parse_range(header, size):
+    """(inicio, fin) inclusivos de un `Range: bytes=...` simple.
+
+    None si no hay rango utilizable (ausente, varios rangos o mal formado: se sirve
+    el archivo completo); "unsatisfiable" si el rango cae fuera del archivo.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_s, sep, end_s = header[len("bytes="):].strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if start_s == "":
+            suffix = int(end_s)
+            if suffix <= 0:
+                return "unsatisfiable"
+            return max(0, size - suffix), size - 1
+        start = int(start_s)
+        end = int(end_s) if end_s else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return "unsatisfiable"
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+class FileCache:
+    """Contenido y ETag por ruta; una entrada vale mientras no cambien mtime_ns ni el tamaño."""
+
+    def __init__(self, max_file=CACHE_MAX_FILE):
+        self.max_file = max_file
+        self._entries = {}
+        self._variants = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, path):
+        """(st, datos o None si el archivo es muy grande, etag)."""
+        st = os.stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == key:
+                self.stats["hits"] += 1
+                return st, entry[1], entry[2]
+            self.stats["misses"] += 1
+
+        h = hashlib.sha256()
+        data = None
+        with open(path, "rb") as f:
+            if st.st_size <= self.max_file:
+                data = f.read()
+                h.update(data)
+            else:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+        etag = f'"{h.hexdigest()[:32]}"'
+        with self._lock:
+            self._entries[path] = (key, data, etag)
+        return st, data, etag
+
+    def variant_matches(self, path, variant, encoding):
+        """True si `variant` (.gz/.br) descomprimido es idéntico a `path`; cacheado por versión."""
+        st, vst = os.stat(path), os.stat(variant)
+        key = (st.st_mtime_ns, st.st_size, vst.st_mtime_ns, vst.st_size)
+        with self._lock:
+            entry = self._variants.get(variant)
+            if entry is not None and entry[0] == key:
+                return entry[1]
+        try:
+            if encoding == "gzip":
+                h = hashlib.sha256()
+                with gzip.open(variant, "rb") as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b""):
+                        h.update(chunk)
+                digest = h.hexdigest()
+            elif brotli is not None:
+                with open(variant, "rb") as f:
+                    digest = hashlib.sha256(brotli.decompress(f.read())).hexdigest()
+            else:
+                digest = None  # sin el módulo brotli no se puede verificar: no se usa
+        except (OSError, EOFError, ValueError) as exc:
+            print(f"  [!] Variante ilegible {variant}: {exc}")
+            digest = None
+        ok = digest is not None and digest == _file_sha256(path)
+        with self._lock:
+            self._variants[variant] = (key, ok)
+        return ok
+
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
 class Handler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    cache = FileCache()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=DIR, **kwargs)
 
+    # ---- Negociación y validación ----
+    def _negotiate(self, path):
+        """(ruta a servir, Content-Encoding) con la mejor variante precomprimida vigente."""
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding"))
+        for encoding, suffix in ENCODINGS:
+            variant = path + suffix
+            if (encoding in accepted and os.path.isfile(variant)
+                    and self.cache.variant_matches(path, variant, encoding)):
+                return variant, encoding
+        return path, None
+
+    def _not_modified(self, etag, mtime):
+        inm = self.headers.get("If-None-Match")
+        if inm is not None:
+            tags = [t.strip().removeprefix("W/") for t in inm.split(",")]
+            return "*" in tags or etag in tags
+        ims = self.headers.get("If-Modified-Since")
+        if ims:
+            try:
+                return int(mtime) <= parsedate_to_datetime(ims).timestamp()
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+        return False
+
+    def _range_applies(self, etag, mtime):
+        """If-Range: el rango solo vale si el validador coincide con la versión actual."""
+        if_range = self.headers.get("If-Range")
+        if not if_range:
+            return True
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            return if_range == etag
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_range).timestamp()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+
+    # ---- Respuesta ----
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.split("?", 1)[0].endswith("/"):
+            index = os.path.join(path, "index.html")
+            if os.path.isfile(index):
+                path = index
+        if not os.path.isfile(path) or path.endswith((".gz", ".br")):
+            return super().send_head()
+
+        served, encoding = self._negotiate(path)
+        try:
+            st, data, etag = self.cache.get(served)
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+        versioned = "v=" in urlsplit(self.path).query
+
+        def common_headers():
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            self.send_header("Vary", "Accept-Encoding")
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Last-Modified", self.date_time_string(st.st_mtime))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", CACHE_IMMUTABLE if versioned else CACHE_REVALIDATE)
+
+        if self._not_modified(etag, st.st_mtime):
+            self.send_response(304)
+            common_headers()
+            self.end_headers()
+            return None
+
+        size = st.st_size
+        rng = parse_range(self.headers.get("Range"), size) if self._range_applies(etag, st.st_mtime) else None
+        if rng == "unsatisfiable":
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            common_headers()
+            self.end_headers()
+            return None
+
+        start, end = rng if rng else (0, size - 1)
+        length = end - start + 1 if size else 0
+        if data is not None:
+            body = data[start:start + length]
+        else:
+            with open(served, "rb") as f:
+                f.seek(start)
+                body = f.read(length)
+
+        self.send_response(206 if rng else 200)
+        self.send_header("Content-type", self.guess_type(path))
+        if rng:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(len(body)))
+        common_headers()
+        self.end_headers()
+        return io.BytesIO(body)
+
+    # ---- Logs con tiempos ----
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == "content-length":
+            self._length = value
+        super().send_header(keyword, value)
+
+    def log_request(self, code="-", size="-"):
+        pass  # reemplazado por la línea con tiempos de _timed
+
+    def _timed(self, method):
+        t0 = time.perf_counter()
+        self._status, self._length = None, "-"
+        method()
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"  {self.address_string()} {self.command} {self.path} -> {self._status} "
+              f"{self._length} B {ms:.1f} ms")
+
+    def do_GET(self):
+        self._timed(super().do_GET)
+
+    def do_HEAD(self):
+        self._timed(super().do_HEAD)
+
     def log_message(self, format, *args):
         print(f"  {self.address_string()} - {format % args}")
 
+
+class DashboardServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor local del dashboard CELEC.")
+    parser.add_argument("--dir", default=DIR, help="Directorio a servir (default: CCS/outputs)")
+    parser.add_argument("--host", default="")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--page", default="dashboard.html", help="Página que se abre en el navegador")
+    parser.add_argument("--no-browser", action="store_true", help="No abrir el navegador")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    DIR = os.path.abspath(args.dir)
     os.chdir(DIR)
-    url = f"http://localhost:{PORT}/dashboard.html"
+    url = f"http://localhost:{args.port}/{args.page}"
     print(f"Servidor CELEC corriendo en: {url}")
     print("Presiona Ctrl+C para detener.\n")
-    webbrowser.open(url)
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
+    if not args.no_browser:
+        webbrowser.open(url)
+    with DashboardServer((args.host, args.port), Handler) as httpd:
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
-            print("\nServidor detenido.")
+            print(f"\nServidor detenido. Caché: {Handler.cache.stats}")
             sys.exit(0)
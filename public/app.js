@@ -13,6 +13,7 @@
     prod: DATA_BASE + "produccion_diaria_larga.csv",
     hidro: DATA_BASE + "hidrologia_diaria_larga.csv",
     ccs: DATA_BASE + "ccs_caudales_diarios.csv",
+    ccsAggregates: DATA_BASE + "ccs_aggregates.json",
   };
 
   const CCS_COLORS = {
@@ -66,8 +67,7 @@
 
   // ---- State ----
   let META = null;
-  let PROD_DATA = null;
-  let HIDRO_DATA = null;
+  let CCS_AGG = null; // ccs_aggregates.json: precomputed percentiles/bands (null -> compute here)
   let CCS_DATA = null;
   let CCS_GAPS = null;
   let CCS_MONTHLY = null;
@@ -121,8 +121,30 @@
     return Number.isFinite(v) ? v : NaN;
   }
 
+  // Optional numeric column: missing or empty cell -> null
+  function optNumber(x) {
+    if (x === undefined || x === null || String(x).trim() === "") return null;
+    const v = parseNumber(x);
+    return Number.isFinite(v) ? v : null;
+  }
+
+  // Cache-busting: meta.json records a content hash per published file (META.files) and
+  // per shard. Hashed URLs change whenever the content does, so the browser may cache them.
+  function versioned(url, hash) {
+    if (hash === undefined) {
+      const name = url.startsWith(DATA_BASE) ? url.slice(DATA_BASE.length) : url;
+      const entry = META && META.files && META.files[name];
+      hash = entry && entry.hash;
+    }
+    return hash ? `${url}?v=${hash}` : url;
+  }
+
+  function fetchOptions(url) {
+    return { cache: url.includes("?v=") ? "default" : "no-cache" };
+  }
+
   async function loadCSV(url) {
-    const resp = await fetch(url, { cache: "no-cache" });
+    const resp = await fetch(url, fetchOptions(url));
     if (!resp.ok) throw new Error(`HTTP ${resp.status} ${url}`);
     let text = await resp.text();
 
@@ -148,6 +170,65 @@
     });
   }
 
+  // ---- Shards (metric/series/year) ----
+  // meta.json lists one small CSV per metric/series/year (META.<kind>.shards);
+  // only the slices the current selectors need are fetched, once each.
+  const SHARD_CACHE = new Map(); // path -> Promise<rows>
+  const FULL_CACHE = new Map();  // kind -> Promise<rows> (fallback: whole long CSV)
+
+  function memoize(cache, key, load) {
+    if (!cache.has(key)) {
+      const p = load();
+      cache.set(key, p);
+      p.catch(() => cache.delete(key)); // allow a retry after a failed fetch
+    }
+    return cache.get(key);
+  }
+
+  function loadFullDataset(kind) {
+    const url = kind === "produccion" ? FILES.prod : FILES.hidro;
+    return memoize(FULL_CACHE, kind, async () => (await loadCSV(versioned(url))).map(r => ({
+      date: (r.date || "").trim(),
+      serie: (r.series || "").trim(),
+      variable: (r.metric || "").trim(),
+      value: parseNumber(r.value)
+    })).filter(r => r.value > 0));
+  }
+
+  function loadShard(shard) {
+    return memoize(SHARD_CACHE, shard.path, async () => (await loadCSV(versioned(DATA_BASE + shard.path, shard.hash || null))).map(r => ({
+      date: (r.date || "").trim(),
+      serie: shard.series,
+      variable: shard.metric,
+      value: parseNumber(r.value),
+      // Derived column precomputed by build_datasets (absent -> undefined)
+      ma30: "ma30" in r ? optNumber(r.ma30) : undefined
+    })).filter(r => r.value > 0));
+  }
+
+  // Rows (value > 0) of `kind` for the given series and years; metric = null keeps all metrics.
+  async function loadRows(kind, metric, seriesList, years) {
+    const yearSet = new Set(years.map(Number));
+    const wantedSeries = new Set(seriesList);
+    const index = META && META[kind] && META[kind].shards;
+    if (index && index.length) {
+      const wanted = index.filter(s =>
+        (!metric || s.metric === metric) && wantedSeries.has(s.series) && yearSet.has(s.year));
+      try {
+        return (await Promise.all(wanted.map(loadShard))).flat();
+      } catch (e) {
+        console.warn("Shards no disponibles, se usa el dataset completo:", e);
+      }
+    }
+    return (await loadFullDataset(kind)).filter(r =>
+      (!metric || r.variable === metric) && wantedSeries.has(r.serie) && yearSet.has(Number(r.date.slice(0, 4))));
+  }
+
+  async function latestDate(kind) {
+    if (META[kind] && META[kind].date_max) return META[kind].date_max;
+    return (await loadFullDataset(kind)).reduce((m, r) => r.date > m ? r.date : m, "");
+  }
+
   // ---- Redraw Logic ----
   const TICK_VALS = [1, 32, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335];
   const TICK_TEXT = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"];
@@ -158,20 +239,26 @@
     return Math.floor((d - start) / 86400000) + 1;
   };
 
-  function drawProduction() {
-    if (!PROD_DATA || !META) return;
+  let prodDrawSeq = 0;
+  async function drawProduction() {
+    if (!META) return;
 
     const serie = selProdCentral.value;
     const years = getSelectedValues(selProdYears).map(Number);
     const startMonth = parseInt(selProdStartMonth.value);
     const endMonth = parseInt(selProdEndMonth.value);
+    const plantsToInclude = META.produccion.series.filter(s => !s.includes("CSR") && !s.includes("+"));
 
+    // Only the shards for the selected central (line) and the plants (pie) in the selected years
+    const seq = ++prodDrawSeq;
+    const prodRows = await loadRows("produccion", null, [serie, ...plantsToInclude], years);
     // Excluir el último día disponible: el dato del día más reciente
     // suele estar incompleto/preliminar y no debe graficarse.
-    const maxDate = PROD_DATA.reduce((m, r) => r.date > m ? r.date : m, "");
+    const maxDate = await latestDate("produccion");
+    if (seq !== prodDrawSeq) return; // a newer selection is already being drawn
 
     // Filter Rows
-    const filteredProdData = PROD_DATA.filter(r => {
+    const filteredProdData = prodRows.filter(r => {
       if (r.date === maxDate) return false;
       const m = parseInt(r.date.slice(5, 7));
       return m >= startMonth && m <= endMonth;
@@ -211,7 +298,6 @@
 
     // 2. Pie Chart (Comparison of plants for selected range)
     const pieDataMap = new Map();
-    const plantsToInclude = META.produccion.series.filter(s => !s.includes("CSR") && !s.includes("+"));
     const yearSet = new Set(years);
 
     plantsToInclude.forEach(p => {
@@ -243,8 +329,9 @@
     }, { responsive: true, displayModeBar: false });
   }
 
-  function drawHidrology() {
-    if (!HIDRO_DATA || !META) return;
+  let hidroDrawSeq = 0;
+  async function drawHidrology() {
+    if (!META) return;
 
     const variable = selHidroVariable.value;
     const years = getSelectedValues(selHidroYears).map(Number);
@@ -257,24 +344,35 @@
     if (variable.includes("Caudal")) targetSerie = "Cuenca del Rio Paute";
     if (variable.includes("Cota")) targetSerie = "Mazar";
 
-    const rows = HIDRO_DATA
+    // The 30-day MA comes precomputed in the shards (ma30 column). Without it, also load the
+    // year before each selected one: computing it here needs it for January continuity.
+    const shardMA = (META.hidrologia.shards || []).some(s =>
+      s.metric === variable && s.series === targetSerie && (s.columns || []).includes("ma30"));
+    const loadYears = new Set(years);
+    if (variable.includes("Caudal") && !shardMA) years.forEach(y => loadYears.add(y - 1));
+    const seq = ++hidroDrawSeq;
+    const loaded = await loadRows("hidrologia", variable, [targetSerie], [...loadYears]);
+    if (seq !== hidroDrawSeq) return; // a newer selection is already being drawn
+
+    const rows = loaded
       .filter(r => r.serie === targetSerie && r.variable === variable)
       .sort((a, b) => a.date.localeCompare(b.date));
 
+    // Running-sum moving average (fallback when the shards carry no ma30)
     function calculateMA(data, period) {
-      return data.map((val, idx, arr) => {
-        if (idx < period - 1) return null;
-        const slice = arr.slice(idx - period + 1, idx + 1);
-        const sum = slice.reduce((a, b) => a + b, 0);
-        return sum / period;
+      let sum = 0;
+      return data.map((val, idx) => {
+        sum += val;
+        if (idx >= period) sum -= data[idx - period];
+        return idx < period - 1 ? null : sum / period;
       });
     }
 
-    // Pre-calculate MA for ALL rows to have January continuity
-    const allValues = rows.map(r => r.value);
-    const allMA = calculateMA(allValues, 30);
-    // Attach MA to rows
-    rows.forEach((r, idx) => r.ma30 = allMA[idx]);
+    if (!rows.every(r => r.ma30 !== undefined)) {
+      // Pre-calculate MA for ALL rows to have January continuity
+      const allMA = calculateMA(rows.map(r => r.value), 30);
+      rows.forEach((r, idx) => r.ma30 = allMA[idx]);
+    }
 
     const traces = [];
     const minDoy = getGenericDoy(startMonth, 1);
@@ -310,17 +408,11 @@
 
         // Moving Average Trace (Only for Caudal)
         if (variable.includes("Caudal")) {
-          const maTraceData = yearRows
+          // MA points of the rows in the current month range
+          const filteredMA = displayRows
             .filter(r => r.ma30 !== null)
             .map(r => ({ doy: doyFromISO(r.date), val: r.ma30 }));
 
-          // Filter MA trace data for current month range
-          const filteredMA = maTraceData.filter(item => {
-            const row = yearRows.find(r => doyFromISO(r.date) === item.doy);
-            const m = parseInt(row.date.slice(5, 7));
-            return m >= startMonth && m <= endMonth;
-          });
-
           if (filteredMA.length > 0) {
             traces.push({
               type: "scatter",
@@ -490,9 +582,17 @@
   function ccsRenderHero() {
     if (!CCS_DATA || !CCS_DATA.length) return;
     const last = CCS_DATA[CCS_DATA.length - 1];
-    const histCoca = ccsHistoricalCocaForSemaforo(last.date);
-    const p50 = ccsPercentile(histCoca, 50);
-    const p90 = ccsPercentile(histCoca, 90);
+    // Percentiles precomputed up to (excluding) the last day, if ccs_aggregates.json is current
+    const sem = CCS_AGG && CCS_AGG.semaforo;
+    let p50, p90;
+    if (sem && sem.until === last.dateStr) {
+      p50 = sem.coca_p50;
+      p90 = sem.coca_p90;
+    } else {
+      const histCoca = ccsHistoricalCocaForSemaforo(last.date);
+      p50 = ccsPercentile(histCoca, 50);
+      p90 = ccsPercentile(histCoca, 90);
+    }
 
     const cocaPctRel = (last.coca != null && p50 != null && p90 != null)
       ? (last.coca > p90 ? 'rojo' : (last.coca > p50 ? 'ambar' : 'verde'))
@@ -568,27 +668,38 @@
     const last = CCS_DATA[CCS_DATA.length - 1];
     const currentYear = last.date.getUTCFullYear();
 
-    // Agrupar valores históricos por día del año (años < currentYear)
-    const byDoy = new Map();
-    CCS_DATA.forEach(r => {
-      if (r.date.getUTCFullYear() >= currentYear) return;
-      const v = r[serie];
-      if (v == null) return;
-      const doy = ccsDayOfYear(r.date);
-      if (!byDoy.has(doy)) byDoy.set(doy, []);
-      byDoy.get(doy).push(v);
-    });
+    let doys = [];
+    let minArr = [], maxArr = [], p25Arr = [], p75Arr = [];
+    const band = CCS_AGG && CCS_AGG.current_year === currentYear && CCS_AGG.bands
+      ? CCS_AGG.bands[serie] : null;
+    if (band) {
+      // Bandas precalculadas en ccs_aggregates.json
+      doys = band.doy;
+      minArr = band.min;
+      maxArr = band.max;
+      p25Arr = band.p25;
+      p75Arr = band.p75;
+    } else {
+      // Agrupar valores históricos por día del año (años < currentYear)
+      const byDoy = new Map();
+      CCS_DATA.forEach(r => {
+        if (r.date.getUTCFullYear() >= currentYear) return;
+        const v = r[serie];
+        if (v == null) return;
+        const doy = ccsDayOfYear(r.date);
+        if (!byDoy.has(doy)) byDoy.set(doy, []);
+        byDoy.get(doy).push(v);
+      });
 
-    const doys = [];
-    const minArr = [], maxArr = [], p25Arr = [], p75Arr = [];
-    for (let d = 1; d <= 366; d++) {
-      if (!byDoy.has(d)) continue;
-      const vals = byDoy.get(d);
-      doys.push(d);
-      minArr.push(Math.min(...vals));
-      maxArr.push(Math.max(...vals));
-      p25Arr.push(ccsPercentile(vals, 25));
-      p75Arr.push(ccsPercentile(vals, 75));
+      for (let d = 1; d <= 366; d++) {
+        if (!byDoy.has(d)) continue;
+        const vals = byDoy.get(d);
+        doys.push(d);
+        minArr.push(Math.min(...vals));
+        maxArr.push(Math.max(...vals));
+        p25Arr.push(ccsPercentile(vals, 25));
+        p75Arr.push(ccsPercentile(vals, 75));
+      }
     }
 
     // Año actual
@@ -870,7 +981,7 @@
   async function boot() {
     try {
       metaStatus.textContent = "Cargando metadatos...";
-      META = await (await fetch(FILES.meta)).json();
+      META = await (await fetch(FILES.meta, { cache: "no-cache" })).json();
 
       // Populate Production
       clearSelect(selProdCentral);
@@ -887,31 +998,15 @@
       META.hidrologia.years.sort((a, b) => b - a).forEach(y => addOption(selHidroYears, y, y));
       if (selHidroYears.options.length >= 1) selHidroYears.options[0].selected = true;
 
-      const [pData, hData, cData] = await Promise.all([
-        loadCSV(FILES.prod),
-        loadCSV(FILES.hidro),
-        loadCSV(FILES.ccs).catch(() => []),
+      // Production/hydrology rows are fetched per shard by the draw functions
+      const [cData, agg, prodLatest, hidroLatest] = await Promise.all([
+        loadCSV(versioned(FILES.ccs)).catch(() => []),
+        fetch(versioned(FILES.ccsAggregates), fetchOptions(versioned(FILES.ccsAggregates)))
+          .then(r => r.ok ? r.json() : null).catch(() => null),
+        latestDate("produccion"),
+        latestDate("hidrologia"),
       ]);
-
-      PROD_DATA = pData.map(r => {
-        const val = parseNumber(r.value);
-        return {
-          date: (r.date || "").trim(),
-          serie: (r.series || "").trim(),
-          variable: (r.metric || "").trim(),
-          value: val
-        };
-      }).filter(r => r.value > 0);
-
-      HIDRO_DATA = hData.map(r => {
-        const val = parseNumber(r.value);
-        return {
-          date: (r.date || "").trim(),
-          serie: (r.series || "").trim(),
-          variable: (r.metric || "").trim(),
-          value: val
-        };
-      }).filter(r => r.value > 0);
+      CCS_AGG = agg;
 
       // CCS
       if (cData && cData.length) {
@@ -939,7 +1034,7 @@
         });
       }
 
-      const allDates = [...PROD_DATA, ...HIDRO_DATA].map(r => r.date).filter(Boolean);
+      const allDates = [prodLatest, hidroLatest].filter(Boolean);
       if (allDates.length > 0) {
         const latest = allDates.sort().pop();
         if (latest && latest.includes("-")) {
@@ -953,8 +1048,6 @@
         metaStatus.textContent = "Datos listos";
       }
 
-      console.log("PROD_DATA sample:", PROD_DATA.slice(0, 2));
-
       // Listeners
       selProdCentral.addEventListener("change", drawProduction);
       selProdYears.addEventListener("change", drawProduction);
@@ -977,7 +1070,7 @@
         drawHidrology();
       });
 
-      drawProduction();
+      await drawProduction();
     } catch (e) {
       console.error(e);
       metaStatus.textContent = "Error al cargar datos";
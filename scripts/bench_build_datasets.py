@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmark: vectorized long-format builders vs. the previous row-by-row implementation.
+
+Runs both over the full Produ_mensual/ and Hidro_mensual/ history, checks that the
+published CSV text is byte-identical and reports the speedup, end to end and for the
+reshape alone (monthly files read once up front). Writes nothing.
+
+Usage:
+    python scripts/bench_build_datasets.py --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import build_datasets as bd  # noqa: E402
+
+
+# ---------------- Reference (row-by-row) implementation ----------------
+def _ref_doy365(d: pd.Timestamp) -> int:
+    if d.month == 2 and d.day == 29:
+        d = d.replace(day=28)
+    return int(pd.Timestamp(year=2001, month=d.month, day=d.day).dayofyear)
+
+
+def _ref_mmdd_label(d: pd.Timestamp) -> str:
+    return f"{int(d.day):02d}-{bd.MONTH_ABBR[int(d.month) - 1]}"
+
+
+def _ref_is_placeholder_row(row: pd.Series, value_cols: List[str]) -> int:
+    vals = []
+    for c in value_cols:
+        v = row.get(c, pd.NA)
+        if pd.isna(v):
+            return 0
+        try:
+            vals.append(float(v))
+        except Exception:
+            return 0
+    if not vals:
+        return 0
+    return int(all(v == 0.0 for v in vals))
+
+
+def _ref_rows(df: pd.DataFrame, value_cols: List[str], specs) -> list:
+    df["is_placeholder"] = df.apply(lambda r: _ref_is_placeholder_row(r, value_cols), axis=1)
+    rows = []
+    for _, r in df.iterrows():
+        dt = r["Fecha"]
+        base = {"date": dt.date().isoformat(), "year": int(dt.year), "doy365": _ref_doy365(dt), "mmdd": _ref_mmdd_label(dt)}
+        for series, metric, col in specs:
+            val = r.get(col, pd.NA)
+            if pd.isna(val):
+                continue
+            rows.append({**base, "series": series, "metric": metric, "value": float(val),
+                         "is_placeholder": int(r["is_placeholder"])})
+    return rows
+
+
+def reference_produccion() -> pd.DataFrame:
+    comp_cols = list(bd.PROD_COMPONENTS.values())
+    specs = [(plant, bd.PROD_METRIC, col) for plant, col in bd.PROD_COMPONENTS.items()]
+    specs.append((bd.PROD_CSR_SERIES, bd.PROD_METRIC, bd.PROD_CSR))
+    rows = []
+    for f in sorted(bd.PROD_DIR.glob("*.csv")):
+        df = bd._parse_date_col(bd._normalize_cols(bd._read_csv_any_encoding(f)), "Fecha")
+        df = bd._ensure_cols(df, ["Fecha"] + comp_cols + [bd.PROD_CSR])
+        for c in comp_cols + [bd.PROD_CSR]:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+        comp_sum = df[comp_cols].sum(axis=1, min_count=1)
+        df[bd.PROD_CSR] = comp_sum.where(~comp_sum.isna(), df[bd.PROD_CSR])
+        rows.extend(_ref_rows(df, comp_cols + [bd.PROD_CSR], specs))
+    out = pd.DataFrame(rows).drop_duplicates(subset=["date", "series", "metric"], keep="last")
+    return out.sort_values(["date", "series"])
+
+
+def reference_hidrologia() -> pd.DataFrame:
+    specs, num_cols = [], []
+    for plant, (caudal_col, cota_col) in bd.HIDRO_PLANTS.items():
+        specs.append((plant, bd.HIDRO_CAUDAL_METRIC, caudal_col))
+        num_cols.append(caudal_col)
+        if cota_col:
+            specs.append((plant, bd.HIDRO_COTA_METRIC, cota_col))
+            num_cols.append(cota_col)
+    rows = []
+    for f in sorted(bd.HIDRO_DIR.glob("*.csv")):
+        df = bd._parse_date_col(bd._normalize_cols(bd._read_csv_any_encoding(f)), "Fecha")
+        df = bd._ensure_cols(df, ["Fecha"] + num_cols)
+        for c in num_cols:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+        rows.extend(_ref_rows(df, num_cols, specs))
+    out = pd.DataFrame(rows).drop_duplicates(subset=["date", "series", "metric"], keep="last")
+    return out.sort_values(["date", "series", "metric"])
+
+
+# ---------------- Benchmark ----------------
+def _best_of(fn, repeat: int) -> tuple[float, pd.DataFrame]:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def _published_csv(df: pd.DataFrame) -> str:
+    return df[df["is_placeholder"] == 0].to_csv(index=False)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    cases = [
+        ("produccion_diaria_larga", reference_produccion, bd.build_produccion_diaria_larga),
+        ("hidrologia_diaria_larga", reference_hidrologia, bd.build_hidrologia_diaria_larga),
+    ]
+    status = 0
+    read_csv = bd._read_csv_any_encoding
+    for phase in ("end-to-end", "reshape only"):
+        if phase == "reshape only":
+            cached = functools.lru_cache(maxsize=None)(read_csv)
+            bd._read_csv_any_encoding = lambda path: cached(path).copy()
+        try:
+            for name, ref_fn, new_fn in cases:
+                t_ref, ref = _best_of(ref_fn, args.repeat)
+                t_new, new = _best_of(new_fn, args.repeat)
+                identical = _published_csv(ref) == _published_csv(new)
+                status |= 0 if identical else 1
+                print(f"[{phase:<12}] {name:<24} rows={len(new):6d}  row-by-row {t_ref:6.3f}s  "
+                      f"vectorized {t_new:6.3f}s  speedup x{t_ref / t_new:5.2f}  "
+                      f"identical={'yes' if identical else 'NO'}")
+        finally:
+            bd._read_csv_any_encoding = read_csv
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
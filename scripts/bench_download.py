@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmark de download_data.py contra la API simulada (scripts/mock_celec_api.py).
+
+Mide tiempo total y consultas/s para:
+  - la corrida diaria (hoy + 5 días), y
+  - un backfill de un año (--since/--until).
+
+Todo se escribe en un directorio temporal; no toca Produ_mensual/ ni Hidro_mensual/ del repo.
+
+Uso:
+    python scripts/bench_download.py --latency 0.2 --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import download_data  # noqa: E402
+from mock_celec_api import start_server  # noqa: E402
+
+
+def _run(label: str, server, argv: list[str]) -> dict:
+    before = server.stats["requests"]
+    out = io.StringIO()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(out):
+        download_data.main(argv)
+    wall = time.perf_counter() - t0
+    requests = server.stats["requests"] - before
+    summary = next((line for line in out.getvalue().splitlines() if line.startswith("API CELEC:")), "")
+    return {"label": label, "wall_s": wall, "requests": requests, "rps": requests / wall if wall else 0.0, "summary": summary}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark del bot de descarga contra la API simulada.")
+    parser.add_argument("--latency", type=float, default=0.1, help="Latencia simulada por consulta (s)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--points-per-hour", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=download_data.MAX_WORKERS)
+    parser.add_argument("--backfill-days", type=int, default=365)
+    parser.add_argument("--skip-backfill", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    # Backoff corto: el benchmark mide throughput, no la paciencia ante errores
+    download_data.BACKOFF_BASE = 0.05
+
+    server, _thread = start_server(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        points_per_hour=args.points_per_hour,
+    )
+    common = ["--base-url", server.base_url, "--workers", str(args.workers), "--no-cache"]
+    until = datetime.now().date() - timedelta(days=1)
+    since = until - timedelta(days=args.backfill_days - 1)
+
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="celec_bench_") as tmp:
+        os.chdir(tmp)
+        try:
+            results.append(_run("diario (6 días)", server, common + ["--days", "5"]))
+            if not args.skip_backfill:
+                results.append(_run(
+                    f"backfill ({args.backfill_days} días)",
+                    server,
+                    common + ["--since", since.isoformat(), "--until", until.isoformat()],
+                ))
+        finally:
+            os.chdir(cwd)
+            server.shutdown()
+            server.server_close()
+
+    print(f"API simulada: latencia={args.latency}s jitter={args.jitter}s error_rate={args.error_rate} "
+          f"puntos/hora={args.points_per_hour} workers={args.workers}")
+    for r in results:
+        print(f"  {r['label']:<22} {r['wall_s']:8.2f} s  {r['requests']:6d} consultas  {r['rps']:8.1f} consultas/s")
+        if r["summary"]:
+            print(f"    {r['summary']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -13,30 +13,73 @@ Treats rows with all-zero values as placeholders (not yet published by source) a
 
 from __future__ import annotations
 
+import argparse
+import gzip
+import hashlib
+import io
 import json
+import os
+import re
+import shutil
+import tempfile
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import Callable, List, Dict, Tuple
 
+import numpy as np
 import pandas as pd
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+    pq = None
+
+try:
+    import brotli
+except ImportError:  # .br siblings are optional (.gz is always written)
+    brotli = None
+
+from hourly_store import HOURLY_DIRS, aggregate_hourly
+from warehouse import Warehouse
+
 REPO_ROOT = Path(__file__).resolve().parents[1]
 PROD_DIR = REPO_ROOT / "Produ_mensual"
 HIDRO_DIR = REPO_ROOT / "Hidro_mensual"
 CCS_FLOWS_CSV = REPO_ROOT / "CCS" / "outputs" / "celec_daily_flows.csv"
+BUILD_CACHE_DIR = REPO_ROOT / ".build_cache"
+# Bump when the fragment layout or the reshape logic changes: invalidates every cached fragment
+BUILD_CACHE_VERSION = 1
+# Threads reading/parsing/melting monthly files (pandas' CSV parser and numpy release the GIL)
+INGEST_WORKERS = min(8, os.cpu_count() or 1)
 
 OUT_DIR1 = REPO_ROOT / "data"
 OUT_DIR2 = REPO_ROOT / "public" / "data"
 OUT_DIR1.mkdir(parents=True, exist_ok=True)
 OUT_DIR2.mkdir(parents=True, exist_ok=True)
+# Per metric/series/year slices of the long datasets, fetched on demand by the dashboard
+SHARD_DIR = OUT_DIR2 / "shards"
+# Text artifacts under public/data/ that get precompressed .gz/.br siblings
+COMPRESS_SUFFIXES = (".csv", ".json")
 
 
-def _read_csv_any_encoding(path: Path) -> pd.DataFrame:
-    for enc in ("utf-8-sig", "utf-8", "cp1252", "latin-1"):
+def _decode_any_encoding(raw: bytes) -> str:
+    """Decode CSV bytes (UTF-8 BOM stripped) with the first of utf-8, cp1252, latin-1 that fits."""
+    if raw.startswith(b"\xef\xbb\xbf"):
+        raw = raw[3:]
+    for enc in ("utf-8", "cp1252"):
         try:
-            return pd.read_csv(path, encoding=enc)
+            return raw.decode(enc)
         except UnicodeDecodeError:
             continue
-    return pd.read_csv(path, encoding="latin-1")
+    return raw.decode("latin-1")
+
+
+def _read_csv_any_encoding(path: Path) -> pd.DataFrame:
+    # Sniff the encoding on the raw bytes so the CSV itself is parsed exactly once
+    return pd.read_csv(io.StringIO(_decode_any_encoding(Path(path).read_bytes())))
 
 
 def _normalize_cols(df: pd.DataFrame) -> pd.DataFrame:
@@ -67,32 +110,197 @@ def _parse_date_col(df: pd.DataFrame, date_col: str = "Fecha") -> pd.DataFrame:
     return df
 
 
-def _doy365(d: pd.Timestamp) -> int:
-    # Normalize to a 365-day calendar by mapping Feb 29 -> Feb 28
-    if d.month == 2 and d.day == 29:
-        d = d.replace(day=28)
-    ref = pd.Timestamp(year=2001, month=d.month, day=d.day)
-    return int(ref.dayofyear)
+MONTH_ABBR = ["ene", "feb", "mar", "abr", "may", "jun", "jul", "ago", "sep", "oct", "nov", "dic"]
+# Day-of-year of the day before the first of each month in a 365-day calendar
+_MONTH_START_DOY365 = np.array([0, 0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334], dtype=np.int64)
+# "dd-mmm" label for every (month, day), indexed by month * 32 + day
+_MMDD_LABELS = np.array(
+    [f"{d:02d}-{MONTH_ABBR[m - 1]}" if m else "" for m in range(13) for d in range(32)],
+    dtype=object,
+)
 
+LONG_COLUMNS = ["date", "year", "doy365", "mmdd", "series", "metric", "value", "is_placeholder"]
 
-def _mmdd_label(d: pd.Timestamp) -> str:
-    months = ["ene","feb","mar","abr","may","jun","jul","ago","sep","oct","nov","dic"]
-    return f"{int(d.day):02d}-{months[int(d.month)-1]}"
 
+def _calendar_arrays(dates: pd.Series) -> Dict[str, np.ndarray]:
+    """Vectorized date, year, doy365 and mmdd label arrays for a datetime Series.
 
-def _is_placeholder_row(row: pd.Series, value_cols: List[str]) -> int:
-    vals = []
-    for c in value_cols:
-        v = row.get(c, pd.NA)
-        if pd.isna(v):
-            return 0
+    doy365 normalizes to a 365-day calendar by mapping Feb 29 -> Feb 28;
+    the mmdd label keeps the real day.
+    """
+    days = dates.to_numpy(dtype="datetime64[D]")
+    year = days.astype("datetime64[Y]").astype(np.int64) + 1970
+    month = days.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    day = (days - days.astype("datetime64[M]")).astype(np.int64) + 1
+    day365 = np.where((month == 2) & (day == 29), 28, day)
+    return {
+        "date": np.datetime_as_string(days, unit="D").astype(object),
+        "year": year,
+        "doy365": _MONTH_START_DOY365[month] + day365,
+        "mmdd": _MMDD_LABELS[month * 32 + day],
+    }
+
+
+def _placeholder_mask(values: np.ndarray) -> np.ndarray:
+    """1 where every value column is present and exactly 0.0 (not yet published by source)."""
+    if values.shape[1] == 0:
+        return np.zeros(values.shape[0], dtype=np.int64)
+    return (~np.isnan(values).any(axis=1) & (values == 0.0).all(axis=1)).astype(np.int64)
+
+
+def _melt_long(df: pd.DataFrame, value_map: Dict[str, Tuple[str, str]], value_cols: List[str]) -> pd.DataFrame:
+    """Reshape a wide monthly frame into long rows, one per non-NA (column -> series, metric).
+
+    Rows come out column by column (like DataFrame.melt), keeping file order within each column.
+    """
+    cal = _calendar_arrays(df["Fecha"])
+    placeholder = _placeholder_mask(df[value_cols].to_numpy(dtype=np.float64, na_value=np.nan))
+
+    cols = list(value_map)
+    wide = df[cols].to_numpy(dtype=np.float64, na_value=np.nan)
+    n_rows, n_cols = wide.shape
+    row_idx = np.tile(np.arange(n_rows), n_cols)
+    col_idx = np.repeat(np.arange(n_cols), n_rows)
+    values = wide.T.ravel()
+    keep = ~np.isnan(values)
+    row_idx, col_idx = row_idx[keep], col_idx[keep]
+
+    series = np.array([value_map[c][0] for c in cols], dtype=object)
+    metric = np.array([value_map[c][1] for c in cols], dtype=object)
+    return pd.DataFrame({
+        "date": cal["date"][row_idx],
+        "year": cal["year"][row_idx],
+        "doy365": cal["doy365"][row_idx],
+        "mmdd": cal["mmdd"][row_idx],
+        "series": series[col_idx],
+        "metric": metric[col_idx],
+        "value": values[keep],
+        "is_placeholder": placeholder[row_idx],
+    }, columns=LONG_COLUMNS)
+
+
+# ---------------- Incremental build cache ----------------
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FragmentCache:
+    """Per-file cache of long-format fragments, keyed on each monthly file's fingerprint.
+
+    The manifest stores size, mtime_ns and sha256 per source file. A file whose size and
+    mtime are unchanged is trusted without hashing; otherwise its hash decides (a fresh
+    git checkout touches every mtime but not the content). Fragments are pickled frames,
+    so a cache hit costs one unpickle instead of read + parse + melt.
+    """
+
+    def __init__(self, root: Path = BUILD_CACHE_DIR):
+        self.root = Path(root)
+        self.manifest_path = self.root / "manifest.json"
+        self.stats = {"hits": 0, "misses": 0}
+        self._entries: Dict[str, dict] = {}
+        self._seen: set[str] = set()
+        self._load()
+
+    @staticmethod
+    def _stamp() -> str:
+        return f"v{BUILD_CACHE_VERSION}-pandas{pd.__version__}"
+
+    def _load(self) -> None:
         try:
-            vals.append(float(v))
-        except Exception:
-            return 0
-    if not vals:
-        return 0
-    return int(all(v == 0.0 for v in vals))
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if manifest.get("stamp") == self._stamp():
+            self._entries = manifest.get("files", {})
+
+    def lookup(self, kind: str, path: Path) -> pd.DataFrame | None:
+        """Cached fragment for `path`, or None if the file changed (or was never seen)."""
+        key = f"{kind}/{path.name}"
+        self._seen.add(key)
+        entry = self._entries.get(key)
+        frag_path = self.root / kind / f"{path.stem}.pkl"
+        if not entry or not frag_path.exists():
+            self.stats["misses"] += 1
+            return None
+
+        st = path.stat()
+        same_stat = entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+        if same_stat or entry["sha256"] == _file_sha256(path):
+            try:
+                frag = pd.read_pickle(frag_path)
+            except Exception:
+                frag = None
+            if frag is not None:
+                entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+                self.stats["hits"] += 1
+                return frag
+        self.stats["misses"] += 1
+        return None
+
+    def store(self, kind: str, path: Path, frag: pd.DataFrame) -> None:
+        st = path.stat()
+        self._write_fragment(self.root / kind / f"{path.stem}.pkl", frag)
+        self._entries[f"{kind}/{path.name}"] = {
+            "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": _file_sha256(path),
+        }
+
+    @staticmethod
+    def _write_fragment(path: Path, frag: pd.DataFrame) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{path.stem}.", suffix=".pkl", dir=path.parent)
+        os.close(fd)
+        try:
+            frag.to_pickle(tmp_name)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def save(self) -> None:
+        """Write the manifest, dropping entries (and fragments) for files no longer on disk."""
+        for key in [k for k in self._entries if k not in self._seen]:
+            kind, name = key.split("/", 1)
+            (self.root / kind / f"{Path(name).stem}.pkl").unlink(missing_ok=True)
+            del self._entries[key]
+        self.root.mkdir(parents=True, exist_ok=True)
+        txt = json.dumps({"stamp": self._stamp(), "files": self._entries}, indent=2, sort_keys=True)
+        tmp = self.manifest_path.with_suffix(".json.tmp")
+        tmp.write_text(txt, encoding="utf-8")
+        os.replace(tmp, self.manifest_path)
+
+
+def _load_monthly_fragments(folder: Path, kind: str, fragment: Callable[[pd.DataFrame], pd.DataFrame],
+                            cache: FragmentCache | None = None, workers: int | None = None) -> List[pd.DataFrame]:
+    files = sorted(folder.glob("*.csv"))
+    if not files:
+        raise FileNotFoundError(f"No monthly CSV files found in {folder}")
+    return _load_fragments(files, kind, fragment, cache, workers)
+
+
+def _load_fragments(files: List[Path], kind: str, fragment: Callable[[pd.DataFrame], pd.DataFrame],
+                    cache: FragmentCache | None = None, workers: int | None = None) -> List[pd.DataFrame]:
+    """Long-format fragment per monthly file, in file order.
+
+    Cached fragments are reused; the remaining files are read, parsed and melted
+    concurrently on a thread pool.
+    """
+    frags: List[pd.DataFrame | None] = [cache.lookup(kind, f) if cache else None for f in files]
+    todo = [i for i, frag in enumerate(frags) if frag is None]
+    if not todo:
+        return frags
+
+    build = lambda i: fragment(_read_csv_any_encoding(files[i]))  # noqa: E731
+    workers = max(1, min(workers or INGEST_WORKERS, len(todo)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i, frag in zip(todo, pool.map(build, todo)):
+            frags[i] = frag
+            if cache is not None:
+                cache.store(kind, files[i], frag)
+    return frags
 
 
 # ---------------- Production ----------------
@@ -105,64 +313,40 @@ PROD_COMPONENTS: Dict[str, str] = {
 PROD_CSR = "EnergiaCsr"  # should equal Mol+Maz+Sop+MSF when components are present
 
 
-def build_produccion_diaria_larga() -> pd.DataFrame:
-    files = sorted(PROD_DIR.glob("*.csv"))
-    if not files:
-        raise FileNotFoundError(f"No production CSV files found in {PROD_DIR}")
-
-    rows = []
-    for f in files:
-        df = _normalize_cols(_read_csv_any_encoding(f))
-        df = _parse_date_col(df, "Fecha")
-
-        expected = ["Fecha"] + list(PROD_COMPONENTS.values()) + [PROD_CSR]
-        df = _ensure_cols(df, expected)
-
-        for c in list(PROD_COMPONENTS.values()) + [PROD_CSR]:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
-
-        comp_cols = list(PROD_COMPONENTS.values())
-        comp_sum = df[comp_cols].sum(axis=1, min_count=1)
-        # If components exist, recompute CSR. Otherwise keep EnergiaCsr if present.
-        df[PROD_CSR] = comp_sum.where(~comp_sum.isna(), df[PROD_CSR])
-
-        value_cols = comp_cols + [PROD_CSR]
-        df["is_placeholder"] = df.apply(lambda r: _is_placeholder_row(r, value_cols), axis=1)
-
-        for _, r in df.iterrows():
-            dt = r["Fecha"]
-            year = int(dt.year)
-            doy = _doy365(dt)
-            mmdd = _mmdd_label(dt)
-
-            for plant, col in PROD_COMPONENTS.items():
-                val = r[col]
-                if pd.isna(val):
-                    continue
-                rows.append({
-                    "date": dt.date().isoformat(),
-                    "year": year,
-                    "doy365": doy,
-                    "mmdd": mmdd,
-                    "series": plant,
-                    "metric": "Energía (MWh)",
-                    "value": float(val),
-                    "is_placeholder": int(r["is_placeholder"]),
-                })
-
-            if not pd.isna(r[PROD_CSR]):
-                rows.append({
-                    "date": dt.date().isoformat(),
-                    "year": year,
-                    "doy365": doy,
-                    "mmdd": mmdd,
-                    "series": "CSR (Mol+Maz+Sop+MSF)",
-                    "metric": "Energía (MWh)",
-                    "value": float(r[PROD_CSR]),
-                    "is_placeholder": int(r["is_placeholder"]),
-                })
-
-    out = pd.DataFrame(rows)
+PROD_CSR_SERIES = "CSR (Mol+Maz+Sop+MSF)"
+PROD_METRIC = "Energía (MWh)"
+
+
+def _prod_fragment(df: pd.DataFrame) -> pd.DataFrame:
+    """Long-format production rows for one monthly file."""
+    df = _normalize_cols(df)
+    df = _parse_date_col(df, "Fecha")
+
+    expected = ["Fecha"] + list(PROD_COMPONENTS.values()) + [PROD_CSR]
+    df = _ensure_cols(df, expected)
+
+    for c in list(PROD_COMPONENTS.values()) + [PROD_CSR]:
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+
+    comp_cols = list(PROD_COMPONENTS.values())
+    comp_sum = df[comp_cols].sum(axis=1, min_count=1)
+    # If components exist, recompute CSR. Otherwise keep EnergiaCsr if present.
+    df[PROD_CSR] = comp_sum.where(~comp_sum.isna(), df[PROD_CSR])
+
+    value_map = {col: (plant, PROD_METRIC) for plant, col in PROD_COMPONENTS.items()}
+    value_map[PROD_CSR] = (PROD_CSR_SERIES, PROD_METRIC)
+    return _melt_long(df, value_map, comp_cols + [PROD_CSR])
+
+
+def build_produccion_diaria_larga(cache: FragmentCache | None = None,
+                                  workers: int | None = None,
+                                  warehouse: Warehouse | None = None) -> pd.DataFrame:
+    if warehouse is not None:
+        # One indexed query over the whole table (one row per day, no cross-file dupes)
+        frags = [_prod_fragment(warehouse.read_table("prod"))]
+    else:
+        frags = _load_monthly_fragments(PROD_DIR, "prod", _prod_fragment, cache, workers)
+    out = pd.concat(frags, ignore_index=True)
     if out.empty:
         raise ValueError("Production dataset ended up empty.")
     
@@ -183,64 +367,41 @@ HIDRO_PLANTS: Dict[str, Tuple[str, str | None]] = {
 }
 
 
-def build_hidrologia_diaria_larga() -> pd.DataFrame:
-    files = sorted(HIDRO_DIR.glob("*.csv"))
-    if not files:
-        raise FileNotFoundError(f"No hydrology CSV files found in {HIDRO_DIR}")
-
-    rows = []
-    for f in files:
-        df = _normalize_cols(_read_csv_any_encoding(f))
-        df = _parse_date_col(df, "Fecha")
-
-        expected = ["Fecha"]
-        for caudal_col, cota_col in HIDRO_PLANTS.values():
-            expected.append(caudal_col)
-            if cota_col:
-                expected.append(cota_col)
-        df = _ensure_cols(df, expected)
-
-        num_cols = [c for c in expected if c != "Fecha"]
-        for c in num_cols:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
-
-        df["is_placeholder"] = df.apply(lambda r: _is_placeholder_row(r, num_cols), axis=1)
-
-        for _, r in df.iterrows():
-            dt = r["Fecha"]
-            year = int(dt.year)
-            doy = _doy365(dt)
-            mmdd = _mmdd_label(dt)
-
-            for plant, (caudal_col, cota_col) in HIDRO_PLANTS.items():
-                vq = r.get(caudal_col, pd.NA)
-                if not pd.isna(vq):
-                    rows.append({
-                        "date": dt.date().isoformat(),
-                        "year": year,
-                        "doy365": doy,
-                        "mmdd": mmdd,
-                        "series": plant,
-                        "metric": "Caudal (m³/s)",
-                        "value": float(vq),
-                        "is_placeholder": int(r["is_placeholder"]),
-                    })
-                
-                if cota_col:
-                    vz = r.get(cota_col, pd.NA)
-                    if not pd.isna(vz):
-                        rows.append({
-                            "date": dt.date().isoformat(),
-                            "year": year,
-                            "doy365": doy,
-                            "mmdd": mmdd,
-                            "series": plant,
-                            "metric": "Cota (msnm)",
-                            "value": float(vz),
-                            "is_placeholder": int(r["is_placeholder"]),
-                        })
-
-    out = pd.DataFrame(rows)
+HIDRO_CAUDAL_METRIC = "Caudal (m³/s)"
+HIDRO_COTA_METRIC = "Cota (msnm)"
+
+
+def _hidro_fragment(df: pd.DataFrame) -> pd.DataFrame:
+    """Long-format hydrology rows for one monthly file."""
+    df = _normalize_cols(df)
+    df = _parse_date_col(df, "Fecha")
+
+    expected = ["Fecha"]
+    value_map: Dict[str, Tuple[str, str]] = {}
+    for plant, (caudal_col, cota_col) in HIDRO_PLANTS.items():
+        expected.append(caudal_col)
+        value_map[caudal_col] = (plant, HIDRO_CAUDAL_METRIC)
+        if cota_col:
+            expected.append(cota_col)
+            value_map[cota_col] = (plant, HIDRO_COTA_METRIC)
+    df = _ensure_cols(df, expected)
+
+    num_cols = [c for c in expected if c != "Fecha"]
+    for c in num_cols:
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+
+    return _melt_long(df, value_map, num_cols)
+
+
+def build_hidrologia_diaria_larga(cache: FragmentCache | None = None,
+                                  workers: int | None = None,
+                                  warehouse: Warehouse | None = None) -> pd.DataFrame:
+    if warehouse is not None:
+        # One indexed query over the whole table (one row per day, no cross-file dupes)
+        frags = [_hidro_fragment(warehouse.read_table("hidro"))]
+    else:
+        frags = _load_monthly_fragments(HIDRO_DIR, "hidro", _hidro_fragment, cache, workers)
+    out = pd.concat(frags, ignore_index=True)
     if out.empty:
         raise ValueError("Hydrology dataset ended up empty.")
     
@@ -265,11 +426,19 @@ def _coma_to_float(v) -> float | None:
         return None
 
 
-def build_ccs_caudales() -> pd.DataFrame:
-    if not CCS_FLOWS_CSV.exists():
+def build_ccs_caudales(warehouse: Warehouse | None = None) -> pd.DataFrame:
+    if warehouse is not None:
+        # Same columns as celec_daily_flows.csv; values are already floats
+        df = warehouse.read_ccs().rename(columns={
+            "coca": "caudal_rio_coca_m3s",
+            "css": "caudal_derivado_css_m3s",
+            "frente": "caudal_frente_erosion_m3s",
+            "balance": "balance_error_m3s",
+        })
+    elif not CCS_FLOWS_CSV.exists():
         return pd.DataFrame(columns=["date", "coca", "css", "frente", "balance", "status"])
-
-    df = _read_csv_any_encoding(CCS_FLOWS_CSV)
+    else:
+        df = _read_csv_any_encoding(CCS_FLOWS_CSV)
     df = _normalize_cols(df)
 
     out_rows = []
@@ -306,15 +475,364 @@ def _write_csv_both(name: str, df: pd.DataFrame) -> None:
     (OUT_DIR2 / name).write_text(csv_text, encoding="utf-8")
 
 
-def _write_json_both(name: str, obj: dict) -> None:
-    txt = json.dumps(obj, ensure_ascii=False, indent=2)
+# Arrow types for the columnar export: date32 dates, small ints, float32 values and
+# dictionary-encoded strings (series/metric/mmdd repeat on every row).
+_PARQUET_TYPES = {
+    "date": "date32",
+    "year": "int16",
+    "doy365": "int16",
+    "mmdd": "dict",
+    "series": "dict",
+    "metric": "dict",
+    "value": "float32",
+    "is_placeholder": "int8",
+    "coca": "float32",
+    "css": "float32",
+    "frente": "float32",
+    "balance": "float32",
+    "status": "dict",
+}
+
+
+def _arrow_table(df: pd.DataFrame):
+    arrays = []
+    for col in df.columns:
+        kind = _PARQUET_TYPES.get(col)
+        values = df[col]
+        if kind == "date32":
+            arr = pa.array(pd.to_datetime(values).dt.date, type=pa.date32())
+        elif kind == "dict":
+            arr = pa.array(values.astype("string"), type=pa.string()).dictionary_encode()
+        elif kind is not None:
+            arr = pa.array(pd.to_numeric(values), type=getattr(pa, kind)(), from_pandas=True)
+        else:
+            arr = pa.array(values, from_pandas=True)
+        arrays.append(arr)
+    return pa.Table.from_arrays(arrays, names=[str(c) for c in df.columns])
+
+
+def _write_parquet_both(name: str, df: pd.DataFrame) -> bool:
+    """Typed Parquet copy of a dataset next to its CSV. Returns False if pyarrow is missing."""
+    if pq is None:
+        return False
+    sink = pa.BufferOutputStream()
+    pq.write_table(_arrow_table(df), sink, compression="zstd")
+    data = sink.getvalue().to_pybytes()
+    (OUT_DIR1 / name).write_bytes(data)
+    (OUT_DIR2 / name).write_bytes(data)
+    return True
+
+
+# ---------------- Aggregates ----------------
+MA_WINDOW = 30
+CLIMATOLOGY_QUANTILES = {"min": 0.0, "p10": 0.10, "p50": 0.50, "p90": 0.90, "max": 1.0}
+# CCS semáforo: Coca percentiles over the history since this date (excluding the last day)
+CCS_SEMAFORO_SINCE = "2025-01-01"
+CCS_BAND_SERIES = ("coca", "css", "frente")
+
+
+def _rounded(values, ndigits: int = 4) -> list:
+    return [None if pd.isna(v) else round(float(v), ndigits) for v in values]
+
+
+def _plotted(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows the dashboard draws: value > 0, sorted by date within each series."""
+    return df[df["value"] > 0].sort_values(["metric", "series", "date"], kind="stable")
+
+
+def add_row_aggregates(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-row derived column stored in the hydrology shards next to each value.
+
+    `ma30`: trailing 30-row mean of the caudal series over the plotted (value > 0) rows,
+    exactly as the dashboard used to compute it (rows, not calendar days). Other metrics
+    and rows with value <= 0 get NaN.
+    """
+    df = df.copy()
+    plotted = _plotted(df)
+    caudal = plotted[plotted["metric"] == HIDRO_CAUDAL_METRIC]
+    ma = caudal.groupby("series", sort=False)["value"].transform(
+        lambda v: v.rolling(MA_WINDOW, min_periods=MA_WINDOW).mean())
+    df["ma30"] = ma.reindex(df.index)
+    return df
+
+
+def _climatology(df: pd.DataFrame) -> List[dict]:
+    """min/p10/p50/p90/max per doy365 across the complete years (the latest year is excluded)."""
+    plotted = _plotted(df)
+    if plotted.empty:
+        return []
+    current_year = int(plotted["year"].max())
+    hist = plotted[plotted["year"] < current_year]
+    out = []
+    for (metric, series), g in hist.groupby(["metric", "series"], sort=True):
+        by_doy = g.groupby("doy365")["value"]
+        q = by_doy.quantile(list(CLIMATOLOGY_QUANTILES.values())).unstack()
+        entry = {
+            "metric": metric,
+            "series": series,
+            "years": [int(g["year"].min()), int(g["year"].max())],
+            "doy365": [int(d) for d in q.index],
+        }
+        for name, quantile in CLIMATOLOGY_QUANTILES.items():
+            entry[name] = _rounded(q[quantile])
+        out.append(entry)
+    return out
+
+
+def _monthly(df: pd.DataFrame, how: str) -> List[dict]:
+    """Monthly `how` ("sum" for energy, "mean" for flows/levels) per metric and series."""
+    plotted = _plotted(df)
+    months = plotted["date"].str.slice(0, 7)
+    out = []
+    for (metric, series), g in plotted.groupby(["metric", "series"], sort=True):
+        agg = g["value"].groupby(months.loc[g.index]).agg(how)
+        out.append({
+            "metric": metric,
+            "series": series,
+            "stat": how,
+            "months": agg.index.tolist(),
+            "values": _rounded(agg.to_numpy()),
+        })
+    return out
+
+
+def _ytd(df: pd.DataFrame) -> List[dict]:
+    """Cumulative monthly energy since Jan 1 of each year, per metric and series."""
+    plotted = _plotted(df)
+    months = plotted["date"].str.slice(0, 7)
+    out = []
+    for (metric, series), g in plotted.groupby(["metric", "series"], sort=True):
+        monthly = g["value"].groupby(months.loc[g.index]).sum()
+        ytd = monthly.groupby(monthly.index.str.slice(0, 4)).cumsum()
+        out.append({
+            "metric": metric,
+            "series": series,
+            "months": ytd.index.tolist(),
+            "values": _rounded(ytd.to_numpy()),
+        })
+    return out
+
+
+def _ccs_aggregates(ccs: pd.DataFrame) -> dict:
+    if ccs.empty:
+        return {}
+    dates = pd.to_datetime(ccs["date"])
+    last_date = ccs["date"].iloc[-1]
+    current_year = int(dates.iloc[-1].year)
+
+    hist = ccs[(ccs["date"] >= CCS_SEMAFORO_SINCE) & (ccs["date"] < last_date)]["coca"].dropna()
+    semaforo = {
+        "since": CCS_SEMAFORO_SINCE,
+        "until": last_date,  # exclusive
+        "coca_p50": round(float(hist.quantile(0.5)), 4) if len(hist) else None,
+        "coca_p90": round(float(hist.quantile(0.9)), 4) if len(hist) else None,
+    }
+
+    # Seasonal bands per real day of year (Feb 29 -> 60), over the years before the last one
+    past = ccs[dates.dt.year < current_year]
+    doy = dates[past.index].dt.dayofyear
+    bands = {}
+    for serie in CCS_BAND_SERIES:
+        by_doy = past[serie].groupby(doy).agg(["min", "max"])
+        q = past[serie].groupby(doy).quantile([0.25, 0.75]).unstack()
+        by_doy = by_doy.join(q).dropna(subset=["min"])
+        bands[serie] = {
+            "doy": [int(d) for d in by_doy.index],
+            "min": _rounded(by_doy["min"]),
+            "p25": _rounded(by_doy[0.25]),
+            "p75": _rounded(by_doy[0.75]),
+            "max": _rounded(by_doy["max"]),
+        }
+    return {"current_year": current_year, "semaforo": semaforo, "bands": bands}
+
+
+def build_aggregates(prod: pd.DataFrame, hidro: pd.DataFrame) -> dict:
+    """Climatology, monthly and year-to-date tables for analysis; the dashboard does not load them."""
+    return {
+        "climatology": {
+            "produccion": _climatology(prod),
+            "hidrologia": _climatology(hidro),
+        },
+        "monthly": {
+            "produccion": _monthly(prod, "sum"),
+            "hidrologia": _monthly(hidro, "mean"),
+        },
+        "ytd": {
+            "produccion": _ytd(prod),
+        },
+    }
+
+
+def _slug(text: str) -> str:
+    """ASCII path component: 'Caudal (m³/s)' -> 'caudal-m3-s'."""
+    ascii_text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", ascii_text.lower()).strip("-")
+
+
+def _write_shards(kind: str, df: pd.DataFrame) -> List[dict]:
+    """Write one small CSV per (metric, series, year) under public/data/shards/<kind>/.
+
+    Columns are `date,value`, plus `ma30` (see add_row_aggregates) on caudal slices.
+
+    Returns the index for meta.json; paths are relative to public/data/. The kind's shard
+    tree is rebuilt from scratch so series or years that disappear leave no stale files.
+    """
+    root = SHARD_DIR / kind
+    if root.exists():
+        shutil.rmtree(root)
+    index = []
+    for (metric, series, year), g in df.groupby(["metric", "series", "year"], sort=True):
+        rel = Path("shards") / kind / _slug(metric) / _slug(series) / f"{int(year)}.csv"
+        path = OUT_DIR2 / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        columns = ["date", "value"] + (["ma30"] if "ma30" in g.columns and g["ma30"].notna().any() else [])
+        data = g[columns].to_csv(index=False).encode("utf-8")
+        path.write_bytes(data)
+        index.append({
+            "metric": metric,
+            "series": series,
+            "year": int(year),
+            "path": rel.as_posix(),
+            "rows": int(len(g)),
+            "columns": columns,
+            "hash": _content_hash(data),
+        })
+    return index
+
+
+def _dataset_meta(df: pd.DataFrame, shards: List[dict]) -> dict:
+    # Dates with a positive value: what the dashboard plots (and uses for "Última fecha")
+    dates = df.loc[df["value"] > 0, "date"]
+    return {
+        "rows": int(len(df)),
+        "years": sorted(df["year"].unique().tolist()),
+        "series": sorted(df["series"].unique().tolist()),
+        "metrics": sorted(df["metric"].unique().tolist()),
+        "date_min": dates.min() if len(dates) else None,
+        "date_max": dates.max() if len(dates) else None,
+        "shards": shards,
+    }
+
+
+def _content_hash(data: bytes) -> str:
+    """Short sha256 used for cache-busting URLs (?v=<hash>)."""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _published_files(names: List[str]) -> Dict[str, dict]:
+    """meta.json `files` entry: content hash and size of each top-level published file."""
+    out = {}
+    for name in names:
+        path = OUT_DIR2 / name
+        if path.exists():
+            data = path.read_bytes()
+            out[name] = {"hash": _content_hash(data), "bytes": len(data)}
+    return out
+
+
+def _write_compressed_siblings(path: Path) -> None:
+    """Write `<file>.gz` (and `<file>.br` when brotli is installed) next to `path`.
+
+    gzip with mtime=0 so unchanged inputs give byte-identical outputs. Without brotli
+    an existing .br is removed rather than left stale.
+    """
+    data = path.read_bytes()
+    Path(f"{path}.gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    br = Path(f"{path}.br")
+    if brotli is not None:
+        br.write_bytes(brotli.compress(data, quality=11))
+    else:
+        br.unlink(missing_ok=True)
+
+
+def _compress_published() -> int:
+    count = 0
+    for path in sorted(OUT_DIR2.rglob("*")):
+        if path.is_file() and path.suffix in COMPRESS_SUFFIXES:
+            _write_compressed_siblings(path)
+            count += 1
+    return count
+
+
+def _remove_compressed_siblings() -> int:
+    """--no-compress: drop the .gz/.br left by an earlier build so none can go stale."""
+    count = 0
+    for path in sorted(OUT_DIR2.rglob("*")):
+        if path.is_file() and path.suffix in (".gz", ".br") and Path(path.stem).suffix in COMPRESS_SUFFIXES:
+            path.unlink()
+            count += 1
+    return count
+
+
+def _json_text(obj: dict, compact: bool) -> str:
+    if compact:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+
+def _write_json_both(name: str, obj: dict, compact: bool = False) -> None:
+    txt = _json_text(obj, compact)
     (OUT_DIR1 / name).write_text(txt, encoding="utf-8")
     (OUT_DIR2 / name).write_text(txt, encoding="utf-8")
 
 
-def main() -> int:
-    prod = build_produccion_diaria_larga()
-    hidro = build_hidrologia_diaria_larga()
+def _write_json_data(name: str, obj: dict, compact: bool = False) -> None:
+    """Write to data/ only, removing a published copy (and its .gz/.br) left by older builds."""
+    (OUT_DIR1 / name).write_text(_json_text(obj, compact), encoding="utf-8")
+    for path in (OUT_DIR2 / name, OUT_DIR2 / f"{name}.gz", OUT_DIR2 / f"{name}.br"):
+        path.unlink(missing_ok=True)
+
+
+def write_hourly_aggregates(rules: List[str]) -> List[Path]:
+    """Aggregate the hourly store (Produ_horario/, Hidro_horario/) into data/ for each pandas rule.
+
+    One `horario_<category>_<rule>.csv` per category with data (sum for production,
+    mean for hydrology); analysis-only, so nothing is published under public/data.
+    """
+    written = []
+    for rule in rules:
+        for category in HOURLY_DIRS:
+            df = aggregate_hourly(category, rule, root=REPO_ROOT)
+            if df.empty:
+                continue
+            df.index.name = "periodo"
+            path = OUT_DIR1 / f"horario_{category}_{_slug(rule)}.csv"
+            df.to_csv(path)
+            written.append(path)
+    return written
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the long-format dashboard datasets.")
+    parser.add_argument("--cache-dir", type=Path, default=BUILD_CACHE_DIR,
+                        help="Per-file fragment cache (default: .build_cache/)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Re-process every monthly file and leave the cache untouched")
+    parser.add_argument("--sqlite", type=Path, metavar="DB",
+                        help="Read daily data from the SQLite warehouse (scripts/warehouse.py) instead of the monthly CSVs")
+    parser.add_argument("--no-parquet", action="store_true",
+                        help="Only write the CSVs (skip the typed Parquet copies)")
+    parser.add_argument("--no-compress", action="store_true",
+                        help="Skip the .gz/.br siblings under public/data")
+    parser.add_argument("--hourly", action="append", default=[], metavar="RULE",
+                        help="Also aggregate the hourly store into data/horario_<category>_<rule>.csv "
+                             "(pandas rule: D, W-MON, MS, 6h...; repeatable)")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS,
+                        help=f"Threads for reading and reshaping monthly files (default: {INGEST_WORKERS})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    warehouse = Warehouse(args.sqlite) if args.sqlite else None
+    cache = None if args.no_cache or warehouse is not None else FragmentCache(args.cache_dir)
+
+    prod = build_produccion_diaria_larga(cache, args.workers, warehouse)
+    hidro = build_hidrologia_diaria_larga(cache, args.workers, warehouse)
+    if cache is not None:
+        cache.save()
+        print(f"Build cache: {cache.stats['misses']} monthly files re-processed, "
+              f"{cache.stats['hits']} reused from {cache.root}")
 
     # Drop placeholder rows (all-zero rows) from published datasets
     prod_pub = prod[prod["is_placeholder"] == 0].copy()
@@ -323,27 +841,50 @@ def main() -> int:
     _write_csv_both("produccion_diaria_larga.csv", prod_pub)
     _write_csv_both("hidrologia_diaria_larga.csv", hidro_pub)
 
-    ccs = build_ccs_caudales()
+    ccs = build_ccs_caudales(warehouse)
+    if warehouse is not None:
+        warehouse.close()
     _write_csv_both("ccs_caudales_diarios.csv", ccs)
 
+    if not args.no_parquet:
+        wrote = all([
+            _write_parquet_both("produccion_diaria_larga.parquet", prod_pub),
+            _write_parquet_both("hidrologia_diaria_larga.parquet", hidro_pub),
+            _write_parquet_both("ccs_caudales_diarios.parquet", ccs),
+        ])
+        if not wrote:
+            print("pyarrow not installed: skipping Parquet export")
+
+    prod_shards = _write_shards("produccion", prod_pub)
+    hidro_shards = _write_shards("hidrologia", add_row_aggregates(hidro_pub))
+    # The dashboard only needs the small CCS block; the large tables stay in data/
+    _write_json_both("ccs_aggregates.json", _ccs_aggregates(ccs), compact=True)
+    _write_json_data("aggregates.json", build_aggregates(prod_pub, hidro_pub), compact=True)
+    if args.hourly:
+        hourly_files = write_hourly_aggregates(args.hourly)
+        print(f"Hourly aggregates: {len(hourly_files)} files in ./data"
+              + ("" if hourly_files else " (no hourly store; run download_data.py --hourly)"))
+
     meta = {
         "generated_at_utc": pd.Timestamp.utcnow().isoformat(),
-        "produccion": {
-            "rows": int(len(prod_pub)),
-            "years": sorted(prod_pub["year"].unique().tolist()),
-            "series": sorted(prod_pub["series"].unique().tolist()),
-            "metrics": sorted(prod_pub["metric"].unique().tolist()),
-        },
-        "hidrologia": {
-            "rows": int(len(hidro_pub)),
-            "years": sorted(hidro_pub["year"].unique().tolist()),
-            "series": sorted(hidro_pub["series"].unique().tolist()),
-            "metrics": sorted(hidro_pub["metric"].unique().tolist()),
-        },
+        "produccion": _dataset_meta(prod_pub, prod_shards),
+        "hidrologia": _dataset_meta(hidro_pub, hidro_shards),
         "ccs": _ccs_meta(ccs),
+        "files": _published_files(sorted(
+            p.name for p in OUT_DIR2.iterdir()
+            if p.is_file() and p.suffix in COMPRESS_SUFFIXES + (".parquet",) and p.name != "meta.json"
+        )),
     }
     _write_json_both("meta.json", meta)
 
+    if not args.no_compress:
+        n = _compress_published()
+        print(f"Precompressed {n} files in ./public/data (.gz{', .br' if brotli is not None else ''})")
+    else:
+        n = _remove_compressed_siblings()
+        if n:
+            print(f"Removed {n} stale .gz/.br files from ./public/data")
+
     print("OK. Wrote datasets to ./data and ./public/data")
     return 0
 
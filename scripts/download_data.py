@@ -1,17 +1,39 @@
 import requests
 import pandas as pd
 import json
-from datetime import datetime, timedelta
+import argparse
+import hashlib
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 import os
+import tempfile
 import urllib3
+from requests.adapters import HTTPAdapter
+
+from hourly_store import DAY_OFFSET, LOCAL_TZ, HourlyAccumulator
+from warehouse import Warehouse
 
 # Deshabilitar advertencias de certificados inseguros ya que usamos verify=False
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # Configuración de la API
-BASE_URL = "https://generacioncsr.celec.gob.ec:8443/ords/csr"
+# CELEC_API_BASE_URL permite apuntar el bot a otro servidor (p. ej. scripts/mock_celec_api.py)
+BASE_URL = os.environ.get("CELEC_API_BASE_URL", "https://generacioncsr.celec.gob.ec:8443/ords/csr")
 TIMEOUT = 30
+# Máximo de consultas simultáneas contra la API
+MAX_WORKERS = 8
+# Reintentos ante errores 5xx / timeouts (backoff exponencial con jitter)
+RETRIES = 3
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 20.0
+# Caché en disco de respuestas crudas: los días con más de SETTLED_DAYS de antigüedad
+# se consideran definitivos y se sirven desde la caché sin consultar la API
+CACHE_DIR = Path("cache") / "celec_api"
+SETTLED_DAYS = 7
 
 # Mapeo de variables
 PROD_ENDPOINTS = {
@@ -47,59 +69,424 @@ def get_monthly_filename(date, category):
     prefix = "Producción" if category == "prod" else "Hidrología"
     return f"{prefix}_CSR_{month_name}-{year}.csv"
 
+def request_key(endpoint, params):
+    """Clave canónica de una consulta: dos consultas con la misma clave devuelven el mismo payload."""
+    return (endpoint, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+def request_data_date(params):
+    """Último día (fecha local) que cubre una consulta, según `fechaFin` o `fecha`."""
+    if params.get("fechaFin"):
+        end = datetime.strptime(str(params["fechaFin"])[:19], "%Y-%m-%dT%H:%M:%S")
+        return (end - timedelta(hours=6)).date()
+    if params.get("fecha"):
+        return datetime.strptime(str(params["fecha"])[:10], "%d/%m/%Y").date()
+    return None
+
+class ResponseCache:
+    """Caché en disco de respuestas crudas ('items') de la API.
+
+    Cada consulta se guarda en `<root>/<xx>/<sha256>.json`, donde el hash se calcula
+    sobre el endpoint y los params canónicos. Una entrada es definitiva sólo si se
+    descargó cuando su día ya estaba asentado (`fetched_at` >= día + `settled_days`);
+    las demás (p. ej. el día de hoy, aún parcial) se vuelven a pedir y se sobrescriben.
+    En modo `offline` se sirve todo lo que haya en caché.
+    """
+
+    def __init__(self, root=CACHE_DIR, settled_days=SETTLED_DAYS, offline=False):
+        self.root = Path(root)
+        self.settled_days = settled_days
+        self.offline = offline
+
+    def _path(self, key):
+        digest = hashlib.sha256(json.dumps(key, ensure_ascii=False).encode("utf-8")).hexdigest()
+        return self.root / digest[:2] / f"{digest}.json"
+
+    def is_settled(self, data_date):
+        if data_date is None:
+            return False
+        return data_date <= (datetime.now() - timedelta(days=self.settled_days)).date()
+
+    def fetched_settled(self, data_date, fetched_at):
+        """True si la respuesta se pidió cuando `data_date` ya estaba asentado."""
+        if data_date is None or not fetched_at:
+            return False
+        try:
+            fetched = datetime.fromisoformat(fetched_at).astimezone().date()
+        except (TypeError, ValueError):
+            return False
+        return fetched >= data_date + timedelta(days=self.settled_days)
+
+    def get(self, key, data_date):
+        if not (self.offline or self.is_settled(data_date)):
+            return None
+        path = self._path(key)
+        try:
+            with path.open(encoding="utf-8") as f:
+                payload = json.load(f)
+            items = payload["items"]
+        except (OSError, ValueError, KeyError):
+            return None
+        if not (self.offline or self.fetched_settled(data_date, payload.get("fetched_at"))):
+            return None
+        return items
+
+    def put(self, key, data_date, items):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "endpoint": key[0],
+            "params": dict(key[1]),
+            "data_date": data_date.isoformat() if data_date else None,
+            "fetched_at": datetime.now(timezone.utc).isoformat(),
+            "items": items,
+        }
+        fd, tmp_name = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=path.parent)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+
+class CelecClient:
+    """Cliente HTTP compartido para la API de CELEC.
+
+    Reutiliza conexiones keep-alive (un solo handshake TLS por conexión del pool),
+    limita las conexiones simultáneas al host y reintenta errores 5xx y timeouts
+    con backoff exponencial + jitter. Lleva la cuenta de llamadas reintentadas y fallidas.
+    Las respuestas exitosas se memorizan durante la corrida: la misma consulta
+    (endpoint, params) nunca se pide dos veces. Con `cache` (ResponseCache) además
+    se persisten en disco y los días asentados no vuelven a la red.
+    """
+
+    def __init__(self, base_url=BASE_URL, timeout=TIMEOUT, retries=RETRIES, max_connections=MAX_WORKERS, cache=None):
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.timeout = timeout
+        self.retries = retries
+        self.session = requests.Session()
+        self.session.verify = False
+        # pool_block=True: nunca más de `max_connections` conexiones abiertas al host
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections, pool_block=True, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._memo = {}
+        self.stats = {"calls": 0, "retried": 0, "retries": 0, "failed": 0, "memo_hits": 0, "cache_hits": 0}
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    def get_items(self, endpoint, params):
+        """Retorna la lista 'items' de la respuesta, o None si la consulta falló definitivamente."""
+        key = request_key(endpoint, params)
+        with self._lock:
+            if key in self._memo:
+                self.stats["memo_hits"] += 1
+                return self._memo[key]
+
+        data_date = request_data_date(params)
+        if self.cache is not None:
+            items = self.cache.get(key, data_date)
+            if items is not None:
+                with self._lock:
+                    self.stats["cache_hits"] += 1
+                    self._memo[key] = items
+                return items
+            if self.cache.offline:
+                self._count("failed")
+                print(f"  [!] Sin respuesta en caché para {endpoint} (modo offline)")
+                return None
+
+        url = f"{self.base_url}/{endpoint}"
+        self._count("calls")
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._count("retries")
+                if attempt == 1:
+                    self._count("retried")
+                time.sleep(self._backoff(attempt - 1))
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                if response.status_code >= 500:
+                    error = requests.HTTPError(f"HTTP {response.status_code}", response=response)
+                    continue
+                response.raise_for_status()
+                items = response.json().get('items', [])
+                with self._lock:
+                    self._memo[key] = items
+                if self.cache is not None:
+                    try:
+                        self.cache.put(key, data_date, items)
+                    except OSError as e:
+                        print(f"  [!] No se pudo guardar en caché {endpoint}: {e}")
+                return items
+            except (requests.Timeout, requests.ConnectionError) as e:
+                error = e
+            except Exception as e:
+                # 4xx, JSON inválido, etc.: reintentar no va a ayudar
+                error = e
+                break
+        self._count("failed")
+        print(f"  [!] Error consultando {endpoint}: {error}")
+        return None
+
+    def summary(self):
+        s = self.stats
+        return (f"{s['calls']} consultas, {s['retried']} reintentadas ({s['retries']} reintentos), "
+                f"{s['failed']} fallidas, {s['memo_hits']} servidas de memoria, {s['cache_hits']} servidas de caché")
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+# Almacén SQLite opcional; main() lo abre con --sqlite
+_warehouse = None
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = CelecClient()
+        return _client
+
 def get_celec_data(endpoint, params):
-    url = f"{BASE_URL}/{endpoint}"
-    try:
-        response = requests.get(url, params=params, timeout=TIMEOUT, verify=False)
-        response.raise_for_status()
-        return response.json().get('items', [])
-    except Exception as e:
-        print(f"  [!] Error consultando {endpoint}: {e}")
-        return []
-
-def download_data_for_date(date):
+    return get_client().get_items(endpoint, params)
+
+def _reduce_items(items, how):
+    # La API devuelve 'valueedit' con valores horarios: se suman (energía) o se promedian (hidrología)
+    vals = [i.get('valueedit', 0) for i in items if i.get('valueedit') is not None]
+    if not vals:
+        return 0.0
+    return sum(vals) if how == "sum" else sum(vals) / len(vals)
+
+def build_date_requests(date, categories=("prod", "hidro")):
+    """Lista de consultas (categoría, columna, endpoint, params) necesarias para una fecha."""
     target_date_str = date.strftime("%d/%m/%Y 00:00:00")
     iso_start = date.strftime("%Y-%m-%dT06:00:00.000Z")
     iso_end = (date + timedelta(days=1)).strftime("%Y-%m-%dT05:59:59.000Z")
-    
-    print(f"\n--- Procesando fecha: {date.strftime('%Y-%m-%d')} ---")
 
+    reqs = []
     # 1. Producción
-    prod_row = {"Fecha": target_date_str}
-    for col, endpoint in PROD_ENDPOINTS.items():
-        items = get_celec_data(endpoint, {"fecha": target_date_str})
-        if items:
-            # La API devuelve 'valueedit' con valores horarios - sumamos para obtener energía diaria
-            vals = [i.get('valueedit', 0) for i in items if i.get('valueedit') is not None]
-            prod_row[col] = sum(vals) if vals else 0.0
-        else:
-            prod_row[col] = 0.0
+    if "prod" in categories:
+        for col, endpoint in PROD_ENDPOINTS.items():
+            reqs.append(("prod", col, endpoint, {"fecha": target_date_str}))
 
     # 2. Hidrología
-    hidro_row = {"Fecha": target_date_str}
-    for col, mrid in HIDRO_MRIDS.items():
+    for col, mrid in (HIDRO_MRIDS.items() if "hidro" in categories else ()):
         params = {
             "mrid": mrid,
             "fechaInicio": iso_start,
             "fechaFin": iso_end,
             "fecha": target_date_str
         }
-        items = get_celec_data("sardomcsr/pointValues", params)
-        if items:
-            # La API devuelve 'valueedit' - calculamos el promedio diario
-            vals = [i.get('valueedit', 0) for i in items if i.get('valueedit') is not None]
-            hidro_row[col] = sum(vals)/len(vals) if vals else 0.0
-        else:
-            hidro_row[col] = 0.0
+        reqs.append(("hidro", col, "sardomcsr/pointValues", params))
+    return reqs
+
+def build_request_plan(dates, categories=("prod", "hidro")):
+    """Agrupa las consultas idénticas de todas las fechas.
+
+    Retorna {request_key: {"params": ..., "targets": [(fecha, categoría, columna), ...]}}:
+    cada consulta única se hace una sola vez y su resultado se reparte a todas las
+    columnas que la necesitan (p. ej. CaudalCuencaPaute y CaudalMaz comparten mrid).
+    """
+    plan = {}
+    for date in dates:
+        for category, col, endpoint, params in build_date_requests(date, categories):
+            entry = plan.setdefault(request_key(endpoint, params), {"params": params, "targets": []})
+            entry["targets"].append((date, category, col))
+    return plan
+
+def download_data_for_dates(dates, max_workers=MAX_WORKERS, hourly=None):
+    """Descarga todas las fechas en paralelo (máximo `max_workers` consultas en vuelo).
+
+    Si se pasa `hourly` (HourlyAccumulator), también se guardan los puntos horarios.
+
+    Retorna una lista de (fecha, prod_row, hidro_row) en el mismo orden de `dates`.
+    """
+    plan = build_request_plan(dates)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        results = list(pool.map(lambda key: get_celec_data(key[0], plan[key]["params"]), plan))
+
+    rows = {}
+    for date in dates:
+        target_date_str = date.strftime("%d/%m/%Y 00:00:00")
+        rows[date] = ({"Fecha": target_date_str}, {"Fecha": target_date_str})
+
+    for entry, items in zip(plan.values(), results):
+        for date, category, col in entry["targets"]:
+            if hourly is not None and items:
+                hourly.add(category, col, _hourly_points(items))
+            prod_row, hidro_row = rows[date]
+            # Una consulta fallida queda como None (celda vacía), no como 0.0
+            if category == "prod":
+                prod_row[col] = None if items is None else _reduce_items(items, "sum")
+            else:
+                hidro_row[col] = None if items is None else _reduce_items(items, "mean")
 
+    return [(date, *rows[date]) for date in dates]
+
+def download_data_for_date(date, max_workers=MAX_WORKERS):
+    print(f"\n--- Procesando fecha: {date.strftime('%Y-%m-%d')} ---")
+    _, prod_row, hidro_row = download_data_for_dates([date], max_workers=max_workers)[0]
     return prod_row, hidro_row
 
+# Claves en las que pointValues puede traer la marca de tiempo de cada punto horario
+TIMESTAMP_KEYS = ("timestamp", "fecha", "fechahora", "datetime", "time")
+
+def _item_timestamp(item):
+    """Marca de tiempo de un punto horario en hora local de Ecuador (naive), o None si no se reconoce.
+
+    Las marcas con zona ("...Z", "...-05:00") se convierten a hora local; las que no la
+    traen ("30/09/2025 14:00:00") ya son hora local, como la columna Fecha de los CSV.
+    """
+    for key in TIMESTAMP_KEYS:
+        value = item.get(key)
+        if not value:
+            continue
+        text = str(value).strip().replace("Z", "+00:00")
+        for parse in (datetime.fromisoformat, lambda t: datetime.strptime(t, "%d/%m/%Y %H:%M:%S")):
+            try:
+                ts = parse(text)
+            except ValueError:
+                continue
+            if ts.tzinfo is not None:
+                ts = ts.astimezone(LOCAL_TZ).replace(tzinfo=None)
+            return ts
+    return None
+
+_warned_no_timestamps = False
+
+def _hourly_points(items):
+    global _warned_no_timestamps
+    points = [(ts, i.get('valueedit')) for i in items if (ts := _item_timestamp(i)) is not None]
+    if items and not points and not _warned_no_timestamps:
+        # Sin este aviso --hourly no guardaría nada en silencio si la API usa otro nombre de campo
+        _warned_no_timestamps = True
+        keys = sorted(items[0]) if isinstance(items[0], dict) else type(items[0]).__name__
+        print(f"  [!] --hourly: {len(items)} puntos sin marca de tiempo reconocida "
+              f"(se buscan {', '.join(TIMESTAMP_KEYS)}; campos recibidos: {keys})")
+    return points
+
+def _item_day(item):
+    # La ventana diaria de la API va de 06:00Z a 05:59:59Z (01:00 a 00:59:59 hora local)
+    ts = _item_timestamp(item)
+    return None if ts is None else (ts - DAY_OFFSET).date()
+
+def month_windows(since, until):
+    """Divide [since, until] en ventanas de un mes calendario (una por archivo mensual)."""
+    windows = []
+    start = since
+    while start <= until:
+        next_month = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+        end = min(until, next_month - timedelta(days=1))
+        windows.append((start, end))
+        start = next_month
+    return windows
+
+def build_hidro_window_plan(windows):
+    """Una consulta pointValues por mrid y ventana multi-día, repartida a todas sus columnas."""
+    plan = {}
+    for start, end in windows:
+        params_base = {
+            "fechaInicio": start.strftime("%Y-%m-%dT06:00:00.000Z"),
+            "fechaFin": (end + timedelta(days=1)).strftime("%Y-%m-%dT05:59:59.000Z"),
+            "fecha": start.strftime("%d/%m/%Y 00:00:00"),
+        }
+        for col, mrid in HIDRO_MRIDS.items():
+            params = {"mrid": mrid, **params_base}
+            entry = plan.setdefault(request_key("sardomcsr/pointValues", params),
+                                    {"params": params, "window": (start, end), "cols": []})
+            entry["cols"].append(col)
+    return plan
+
+def download_range(since, until, max_workers=MAX_WORKERS, hourly=None):
+    """Backfill de [since, until]: hidrología en ventanas mensuales, producción día a día.
+
+    Los endpoints *EnerDia sólo aceptan un día (`fecha`), pero pointValues acepta
+    `fechaInicio`/`fechaFin`: se pide un mes por mrid y los puntos horarios se agrupan
+    localmente por día. Si una ventana no trae marcas de tiempo reconocibles, sus
+    columnas se vuelven a pedir día a día.
+
+    Retorna una lista de (fecha, prod_row, hidro_row) ordenada por fecha.
+    """
+    dates = [since + timedelta(days=i) for i in range((until - since).days + 1)]
+    prod_plan = build_request_plan(dates, categories=("prod",))
+    hidro_plan = build_hidro_window_plan(month_windows(since, until))
+
+    def fetch(key):
+        entry = prod_plan.get(key) or hidro_plan[key]
+        return get_celec_data(key[0], entry["params"])
+
+    keys = list(prod_plan) + list(hidro_plan)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        results = dict(zip(keys, pool.map(fetch, keys)))
+
+    rows = {}
+    for date in dates:
+        target_date_str = date.strftime("%d/%m/%Y 00:00:00")
+        rows[date] = ({"Fecha": target_date_str}, {"Fecha": target_date_str})
+
+    for key, entry in prod_plan.items():
+        items = results[key]
+        for date, _category, col in entry["targets"]:
+            if hourly is not None and items:
+                hourly.add("prod", col, _hourly_points(items))
+            rows[date][0][col] = None if items is None else _reduce_items(items, "sum")
+
+    fallback = []
+    for key, entry in hidro_plan.items():
+        items = results[key]
+        start, end = entry["window"]
+        window_dates = [d for d in dates if start <= d <= end]
+        if items is None:
+            for date in window_dates:
+                for col in entry["cols"]:
+                    rows[date][1][col] = None
+            continue
+
+        buckets = {}
+        for item in items:
+            day = _item_day(item)
+            if day is None:
+                break
+            buckets.setdefault(day, []).append(item)
+        else:
+            for date in window_dates:
+                value = _reduce_items(buckets.get(date.date(), []), "mean")
+                for col in entry["cols"]:
+                    rows[date][1][col] = value
+            if hourly is not None:
+                points = _hourly_points(items)
+                for col in entry["cols"]:
+                    hourly.add("hidro", col, points)
+            continue
+        fallback.extend(window_dates)
+
+    if fallback:
+        print(f"  [!] pointValues sin marcas de tiempo: consultando {len(set(fallback))} días uno por uno")
+        for date, _prod, hidro in download_data_for_dates(sorted(set(fallback)), max_workers, hourly=hourly):
+            rows[date][1].update({k: v for k, v in hidro.items() if k != "Fecha"})
+
+    return [(date, *rows[date]) for date in dates]
+
 def save_to_csv(data_row, category, date):
+    save_rows_to_csv([data_row], category, date)
+
+def save_rows_to_csv(data_rows, category, date):
+    """Fusiona varias filas diarias en el archivo mensual de `date` con una sola lectura/escritura."""
     folder = "Produ_mensual" if category == "prod" else "Hidro_mensual"
     filename = get_monthly_filename(date, category)
     path = Path(folder) / filename
     
-    df_new = pd.DataFrame([data_row])
+    # Si una fecha viene repetida, gana la última fila
+    df_new = pd.DataFrame(data_rows).drop_duplicates('Fecha', keep='last').reset_index(drop=True)
     
     # Asegurar el orden de las columnas según el estándar detectado
     if category == "prod":
@@ -127,11 +514,17 @@ def save_to_csv(data_row, category, date):
             if exist is not None:
                 # Normalizar fechas para comparar
                 exist['Fecha_norm'] = pd.to_datetime(exist['Fecha'], dayfirst=True, errors='coerce')
-                new_date_norm = pd.to_datetime(data_row['Fecha'], dayfirst=True)
+                new_dates_norm = pd.to_datetime(df_new['Fecha'], dayfirst=True)
                 
+                # Columnas cuya consulta falló: conservar el valor ya guardado para esa fecha
+                prev = exist.drop_duplicates('Fecha_norm', keep='last').set_index('Fecha_norm')
+                for c in cols_order[1:]:
+                    if c in prev.columns:
+                        df_new[c] = df_new[c].where(df_new[c].notna(), new_dates_norm.map(prev[c]))
+
                 # Filtrar si la fecha ya existe (para actualizarla)
-                exist = exist[exist['Fecha_norm'] != new_date_norm].drop(columns=['Fecha_norm'])
-                df_final = pd.concat([exist, df_new]).sort_values('Fecha', ascending=False)
+                exist = exist[~exist['Fecha_norm'].isin(new_dates_norm)].drop(columns=['Fecha_norm'])
+                df_final = pd.concat([exist, df_new])
             else:
                 df_final = df_new
         except Exception as e:
@@ -141,38 +534,125 @@ def save_to_csv(data_row, category, date):
         path.parent.mkdir(parents=True, exist_ok=True)
         df_final = df_new
 
-    # Guardar con quotes para mantener compatibilidad con archivos originales
-    df_final.to_csv(path, index=False, quoting=1, encoding='utf-8')
+    df_final = df_final.sort_values('Fecha', ascending=False)
+    # Guardar con quotes para mantener compatibilidad con archivos originales.
+    # Escritura atómica: archivo temporal en la misma carpeta + os.replace,
+    # así un job interrumpido nunca deja un CSV a medio escribir.
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{filename}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            df_final.to_csv(f, index=False, quoting=1)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
     print(f"  [OK] Guardado en {path}")
 
-def main():
-    # Por defecto, intentamos descargar los últimos 3 días para asegurar que no haya huevos por delays en la API
-    today = datetime.now()
-    # Si hoy es 22, descargamos 21, 20, 19
-    days_to_download = 3
-    
-    # Intentamos descargar hoy (0) y los últimos 5 días para asegurar cobertura
+    # Almacén SQLite opcional (--sqlite): mismas filas, upsert por fecha
+    if _warehouse is not None:
+        n = _warehouse.upsert(category, df_new)
+        print(f"  [OK] {n} filas actualizadas en {_warehouse.path}")
+
+class MonthlyAccumulator:
+    """Acumula las filas descargadas por (categoría, mes) y escribe cada archivo mensual una sola vez."""
+
+    def __init__(self):
+        self._rows = {}
+
+    def add(self, data_row, category, date):
+        self._rows.setdefault((category, date.year, date.month), []).append(data_row)
+
+    def flush(self):
+        for (category, year, month), rows in sorted(self._rows.items()):
+            save_rows_to_csv(rows, category, datetime(year, month, 1))
+        self._rows.clear()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Descarga producción e hidrología desde la API de CELEC.")
+    parser.add_argument("--base-url", default=BASE_URL,
+                        help="URL base de la API ORDS (default: CELEC_API_BASE_URL o la API de CELEC)")
+    parser.add_argument("--days", type=int, default=5,
+                        help="Días hacia atrás a descargar además de hoy (default: 5)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help=f"Máximo de consultas simultáneas a la API (default: {MAX_WORKERS})")
+    parser.add_argument("--since", help="Backfill desde YYYY-MM-DD (ignora --days)")
+    parser.add_argument("--until", help="Backfill hasta YYYY-MM-DD (default: hoy)")
+    parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR,
+                        help=f"Caché de respuestas crudas de la API (default: {CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true", help="No leer ni escribir la caché en disco")
+    parser.add_argument("--settled-days", type=int, default=SETTLED_DAYS,
+                        help=f"Días tras los cuales una fecha se sirve desde caché (default: {SETTLED_DAYS})")
+    parser.add_argument("--offline", action="store_true",
+                        help="No consultar la API: recalcular sólo desde la caché")
+    parser.add_argument("--hourly", action="store_true",
+                        help="Guardar también los puntos horarios en Produ_horario/ e Hidro_horario/")
+    parser.add_argument("--sqlite", type=Path, metavar="DB",
+                        help="Actualizar también el almacén SQLite (ver scripts/warehouse.py)")
+    return parser.parse_args(argv)
+
+def _has_data(row):
+    return any((v or 0) > 0 for k, v in row.items() if k != "Fecha")
+
+def run_backfill(since, until, max_workers, hourly=None):
+    print(f"Backfill {since.strftime('%Y-%m-%d')} → {until.strftime('%Y-%m-%d')} con hasta {max_workers} consultas simultáneas...")
+    writer = MonthlyAccumulator()
+    for target_date, prod, hidro in download_range(since, until, max_workers=max_workers, hourly=hourly):
+        if _has_data(prod):
+            writer.add(prod, "prod", target_date)
+        if _has_data(hidro):
+            writer.add(hidro, "hidro", target_date)
+
+    # Un solo guardado por archivo mensual
+    writer.flush()
+    if hourly is not None:
+        hourly.flush()
+
+def main(argv=None):
+    global _client, _warehouse
+    args = parse_args(argv)
+    _warehouse = Warehouse(args.sqlite) if args.sqlite else None
+    cache = None if args.no_cache else ResponseCache(args.cache_dir, args.settled_days, offline=args.offline)
+    _client = CelecClient(base_url=args.base_url, max_connections=max(1, args.workers), cache=cache)
+    hourly = HourlyAccumulator() if args.hourly else None
+
+    if args.since:
+        since = datetime.strptime(args.since, "%Y-%m-%d")
+        until = datetime.strptime(args.until, "%Y-%m-%d") if args.until else datetime.now()
+        until = until.replace(hour=0, minute=0, second=0, microsecond=0)
+        run_backfill(since, until, args.workers, hourly=hourly)
+        print(f"\nAPI CELEC: {get_client().summary()}")
+        return
+
+    # Intentamos descargar hoy (0) y los últimos días para asegurar que no haya huecos por delays en la API
     today = datetime.now()
-    days_to_download = 5
-    
-    for i in range(0, days_to_download + 1):
-        target_date = today - timedelta(days=i)
-        prod, hidro = download_data_for_date(target_date)
-        
+    dates = [today - timedelta(days=i) for i in range(0, args.days + 1)]
+
+    print(f"Descargando {len(dates)} fechas con hasta {args.workers} consultas simultáneas...")
+    writer = MonthlyAccumulator()
+    for target_date, prod, hidro in download_data_for_dates(dates, max_workers=args.workers, hourly=hourly):
+        print(f"\n--- Procesando fecha: {target_date.strftime('%Y-%m-%d')} ---")
+
         # Solo guardar si tenemos datos reales (opcional, pero ayuda a no llenar de ceros si la API falla)
         # Aquí verificamos si al menos una central tiene energía > 0
-        has_prod = any(v > 0 for k, v in prod.items() if k != "Fecha")
-        has_hidro = any(v > 0 for k, v in hidro.items() if k != "Fecha")
+        has_prod = _has_data(prod)
+        has_hidro = _has_data(hidro)
         
         if has_prod:
-            save_to_csv(prod, "prod", target_date)
+            writer.add(prod, "prod", target_date)
         else:
             print(f"  [!] Sin datos de producción para {target_date.strftime('%Y-%m-%d')}, saltando guardado.")
             
         if has_hidro:
-            save_to_csv(hidro, "hidro", target_date)
+            writer.add(hidro, "hidro", target_date)
         else:
             print(f"  [!] Sin datos de hidrología para {target_date.strftime('%Y-%m-%d')}, saltando guardado.")
 
+    # Una lectura y una escritura por archivo mensual tocado en la corrida
+    writer.flush()
+    if hourly is not None:
+        hourly.flush()
+    print(f"\nAPI CELEC: {get_client().summary()}")
+
 if __name__ == "__main__":
     main()
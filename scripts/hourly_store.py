@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""Almacén horario de los puntos 'valueedit' de la API de CELEC.
+
+Un archivo por categoría y mes (`Produ_horario/2024-01.npz`, `Hidro_horario/2024-01.npz`),
+en formato columnar comprimido de numpy:
+
+    timestamps   int64    segundos Unix, ordenados y únicos
+    columns      str      nombres de columna (EnergiaMol, CaudalMaz, ...)
+    <columna>    float32  un valor por timestamp (NaN si no hay dato)
+
+En memoria las horas son locales de Ecuador (UTC-5, sin tzinfo), como las fechas de los
+CSV diarios. El mes de cada punto es el del día al que pertenece en la API (ventana
+06:00Z-05:59Z, es decir 01:00-00:59 hora local), igual que Produ_mensual/ e Hidro_mensual/.
+
+Lo llena `download_data.py --hourly`. Para agregarlo sin volver a consultar la API:
+
+    python scripts/build_datasets.py --hourly D --hourly W-MON         # data/horario_<cat>_<regla>.csv
+    python scripts/hourly_store.py hidro --rule W-MON                  # promedios semanales
+    python scripts/hourly_store.py prod --rule D --since 2025-01-01 --out /tmp/prod_diaria.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+HOURLY_DIRS = {"prod": "Produ_horario", "hidro": "Hidro_horario"}
+# Hora de Ecuador continental: UTC-5 todo el año (sin horario de verano)
+LOCAL_TZ = timezone(timedelta(hours=-5), "America/Guayaquil")
+# El día de la API empieza a las 06:00Z = 01:00 hora local
+DAY_OFFSET = timedelta(hours=1)
+
+
+def partition_path(root: Path, category: str, year: int, month: int) -> Path:
+    return Path(root) / HOURLY_DIRS[category] / f"{year:04d}-{month:02d}.npz"
+
+
+def _from_epoch(ts) -> pd.DatetimeIndex:
+    """Segundos Unix -> hora local naive."""
+    return pd.to_datetime(ts, unit="s", utc=True).tz_convert(LOCAL_TZ).tz_localize(None)
+
+
+def _to_epoch(index: pd.DatetimeIndex) -> np.ndarray:
+    """Hora local naive -> segundos Unix."""
+    return index.tz_localize(LOCAL_TZ).as_unit("s").asi8.astype(np.int64)
+
+
+def read_partition(path: Path) -> pd.DataFrame:
+    """Lee un mes: índice DatetimeIndex en hora local, una columna float32 por variable."""
+    with np.load(path, allow_pickle=False) as data:
+        ts = data["timestamps"]
+        columns = [str(c) for c in data["columns"]]
+        frame = {c: data[c] for c in columns}
+    return pd.DataFrame(frame, index=_from_epoch(ts), columns=columns)
+
+
+def write_partition(path: Path, df: pd.DataFrame) -> None:
+    """Escribe un mes de forma atómica (temporal + os.replace)."""
+    df = df.sort_index()
+    ts = _to_epoch(df.index)
+    arrays = {c: df[c].to_numpy(dtype=np.float32) for c in df.columns}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.stem}.", suffix=".npz", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(f, timestamps=ts, columns=np.array(list(df.columns), dtype=str), **arrays)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def merge_partition(path: Path, new: pd.DataFrame) -> pd.DataFrame:
+    """Fusiona `new` con lo ya guardado: los valores nuevos (no NaN) reemplazan a los viejos."""
+    if path.exists():
+        old = read_partition(path)
+        new = new.combine_first(old)
+    write_partition(path, new)
+    return new
+
+
+def read_hourly(root: Path, category: str, since: datetime | None = None, until: datetime | None = None) -> pd.DataFrame:
+    """Concatena los meses de una categoría (opcionalmente acotados por fecha de día API)."""
+    folder = Path(root) / HOURLY_DIRS[category]
+    frames = []
+    for path in sorted(folder.glob("*.npz")):
+        year, month = (int(x) for x in path.stem.split("-"))
+        if since is not None and (year, month) < (since.year, since.month):
+            continue
+        if until is not None and (year, month) > (until.year, until.month):
+            continue
+        frames.append(read_partition(path))
+    if not frames:
+        return pd.DataFrame(index=pd.DatetimeIndex([]), dtype=np.float32)
+    df = pd.concat(frames).sort_index()
+    df = df[~df.index.duplicated(keep="last")]
+    day = (df.index - DAY_OFFSET).normalize()
+    mask = np.ones(len(df), dtype=bool)
+    if since is not None:
+        mask &= day >= pd.Timestamp(since).normalize()
+    if until is not None:
+        mask &= day <= pd.Timestamp(until).normalize()
+    return df[mask]
+
+
+def aggregate_hourly(category: str, rule: str = "D", how: str | None = None,
+                     since=None, until=None, root: Path = REPO_ROOT) -> pd.DataFrame:
+    """Agrega el almacén horario con cualquier alias de pandas ("D", "W-MON", "MS", "6h", ...).
+
+    Los períodos siguen el día de la API (01:00-00:59 hora local), así que rule="D" reproduce los
+    valores de los CSV mensuales. `how`: "sum" por defecto para producción (MWh) y
+    "mean" para hidrología.
+    """
+    hourly = read_hourly(root, category, since, until)
+    if hourly.empty:
+        return hourly
+    how = how or ("sum" if category == "prod" else "mean")
+
+    shifted = hourly.astype("float64")
+    shifted.index = hourly.index - DAY_OFFSET
+    resampled = shifted.resample(rule)
+    if how == "sum":
+        return resampled.sum(min_count=1)
+    return resampled.agg(how)
+
+
+class HourlyAccumulator:
+    """Acumula puntos horarios por (categoría, mes) durante una corrida y los fusiona al final."""
+
+    def __init__(self, root: Path = Path(".")):
+        self.root = Path(root)
+        self._points: dict[tuple[str, int, int], dict[str, dict[int, float]]] = {}
+
+    def add(self, category: str, column: str, points) -> None:
+        """`points`: iterable de (datetime naive en hora local, valor)."""
+        for ts, value in points:
+            if value is None:
+                continue
+            day = ts - DAY_OFFSET
+            series = self._points.setdefault((category, day.year, day.month), {}).setdefault(column, {})
+            series[int(ts.replace(tzinfo=LOCAL_TZ).timestamp())] = float(value)
+
+    def flush(self) -> list[Path]:
+        written = []
+        for (category, year, month), columns in sorted(self._points.items()):
+            df = pd.DataFrame({c: pd.Series(v, dtype=np.float32) for c, v in columns.items()})
+            df.index = _from_epoch(df.index.to_numpy(dtype=np.int64))
+            path = partition_path(self.root, category, year, month)
+            merge_partition(path, df)
+            written.append(path)
+            print(f"  [OK] Horario guardado en {path}")
+        self._points.clear()
+        return written
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Agrega el almacén horario (Produ_horario/, Hidro_horario/).")
+    parser.add_argument("category", choices=sorted(HOURLY_DIRS))
+    parser.add_argument("--rule", default="D", help="Alias de pandas: D, W-MON, MS, 6h... (default: D)")
+    parser.add_argument("--how", choices=["sum", "mean", "min", "max"],
+                        help="Default: sum para prod, mean para hidro")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="YYYY-MM-DD (día API)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="YYYY-MM-DD (día API)")
+    parser.add_argument("--root", type=Path, default=REPO_ROOT)
+    parser.add_argument("--out", type=Path, help="CSV de salida (default: imprimir)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    df = aggregate_hourly(args.category, args.rule, args.how, args.since, args.until, root=args.root)
+    if df.empty:
+        print(f"  [!] Sin datos horarios en {Path(args.root) / HOURLY_DIRS[args.category]}")
+        return 1
+    df.index.name = "periodo"
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(args.out)
+        print(f"  [OK] {len(df)} períodos escritos en {args.out}")
+    else:
+        print(df.to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
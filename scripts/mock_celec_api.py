@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Servidor local que imita los endpoints ORDS de CELEC usados por download_data.py.
+
+Sirve `<schema>/<central>EnerDia?fecha=...` y `sardomcsr/pointValues?mrid=...&fechaInicio=...&fechaFin=...`
+con la misma forma de respuesta (`{"items": [{"valueedit": ...}, ...]}`), con datos
+deterministas por fecha/mrid y latencia, tasa de error y tamaño de payload configurables.
+
+Uso:
+    python scripts/mock_celec_api.py --port 8787 --latency 0.2 --error-rate 0.05
+    python scripts/download_data.py --base-url http://127.0.0.1:8787/ords/csr
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+API_PREFIX = "/ords/csr/"
+
+
+def _seeded_value(*parts) -> float:
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") / 2**32
+
+
+def _hourly_items(key: str, start: datetime, end: datetime, points_per_hour: int, base: float, spread: float) -> list[dict]:
+    items = []
+    step = timedelta(hours=1) / points_per_hour
+    t = start
+    while t <= end:
+        items.append({
+            "timestamp": t.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "valueedit": round(base + spread * _seeded_value(key, t.isoformat()), 4),
+        })
+        t += step
+    return items
+
+
+class MockCelecServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, error_rate=0.0, points_per_hour=1, seed=0):
+        super().__init__(address, MockCelecHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.points_per_hour = max(1, points_per_hour)
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "items": 0}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX.rstrip('/')}"
+
+    def count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+
+    def draw(self) -> tuple[float, bool]:
+        with self._lock:
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            fail = self.rng.random() < self.error_rate
+        return delay, fail
+
+
+class MockCelecHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MockCelecServer
+
+    def do_GET(self) -> None:
+        self.server.count("requests")
+        delay, fail = self.server.draw()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            self.server.count("errors")
+            self._send(503, {"error": "mock: servicio no disponible"})
+            return
+
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if not url.path.startswith(API_PREFIX):
+            self._send(404, {"error": "not found"})
+            return
+        endpoint = url.path[len(API_PREFIX):]
+
+        try:
+            if endpoint == "sardomcsr/pointValues":
+                items = self._point_values(query)
+            elif endpoint.endswith("EnerDia"):
+                items = self._ener_dia(endpoint, query)
+            else:
+                self._send(404, {"error": f"endpoint desconocido: {endpoint}"})
+                return
+        except (KeyError, ValueError) as exc:
+            self._send(400, {"error": f"parámetros inválidos: {exc}"})
+            return
+
+        self.server.count("items", len(items))
+        self._send(200, {"items": items, "hasMore": False, "count": len(items)})
+
+    def _point_values(self, query: dict) -> list[dict]:
+        start = datetime.strptime(query["fechaInicio"][:19], "%Y-%m-%dT%H:%M:%S")
+        end = datetime.strptime(query["fechaFin"][:19], "%Y-%m-%dT%H:%M:%S")
+        mrid = query["mrid"]
+        # Cotas (msnm) alrededor de 2000, caudales (m3/s) entre 20 y 220
+        base, spread = (1980.0, 170.0) if mrid.endswith("19") or mrid.endswith("31") else (20.0, 200.0)
+        return _hourly_items(f"mrid{mrid}", start, end, self.server.points_per_hour, base, spread)
+
+    def _ener_dia(self, endpoint: str, query: dict) -> list[dict]:
+        day = datetime.strptime(query["fecha"][:10], "%d/%m/%Y")
+        start = day + timedelta(hours=6)
+        end = start + timedelta(hours=23, minutes=59)
+        return _hourly_items(endpoint, start, end, self.server.points_per_hour, 0.0, 400.0 / self.server.points_per_hour)
+
+    def _send(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(host="127.0.0.1", port=0, **options) -> tuple[MockCelecServer, threading.Thread]:
+    """Arranca el servidor en un hilo de fondo (port=0 elige un puerto libre)."""
+    server = MockCelecServer((host, port), **options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Servidor local que imita la API ORDS de CELEC.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0.0, help="Segundos de latencia por consulta")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variación ± de la latencia (segundos)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de consultas que responden 503")
+    parser.add_argument("--points-per-hour", type=int, default=1, help="Puntos por hora en cada respuesta (tamaño del payload)")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    server = MockCelecServer(
+        (args.host, args.port),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        points_per_hour=args.points_per_hour,
+        seed=args.seed,
+    )
+    print(f"API CELEC simulada en: {server.base_url}")
+    print("Presiona Ctrl+C para detener.\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nServidor detenido. {server.stats}")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
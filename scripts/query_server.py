@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Servicio local de consultas sobre los datasets largos de build_datasets.py.
+
+Carga data/produccion_diaria_larga.csv y data/hidrologia_diaria_larga.csv en un índice
+en memoria ordenado por (metric, series, date) y responde solo la ventana pedida,
+buscando los extremos con bisect (sin recorrer ni filtrar todo el dataset):
+
+    GET /series?metric=Caudal (m³/s)&series=Mazar&from=2024-01-01&to=2024-12-31
+    GET /series?metric=Energía (MWh)&series=Molino&agg=M&format=csv
+    GET /catalog                    métricas, series y rango de fechas disponibles
+
+Parámetros de /series:
+    metric, series   obligatorios (tal como aparecen en los CSV)
+    from, to         fechas ISO inclusivas (opcionales)
+    agg              D (default, sin agregar), W (semana ISO, lunes), M (mes) o Y (año)
+    how              sum | mean | min | max (default: sum para energía, mean para el resto)
+    format           json (default) | csv
+
+El índice se recarga solo cuando cambia algún CSV (mtime), p. ej. tras build_datasets.py.
+
+Uso:
+    python scripts/query_server.py --port 8790
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import csv
+import io
+import json
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import groupby
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import parse_qs, urlparse
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DATASETS = (
+    REPO_ROOT / "data" / "produccion_diaria_larga.csv",
+    REPO_ROOT / "data" / "hidrologia_diaria_larga.csv",
+)
+AGG_PERIODS = ("D", "W", "M", "Y")
+AGG_FUNCS = {
+    "sum": sum,
+    "mean": lambda v: sum(v) / len(v),
+    "min": min,
+    "max": max,
+}
+
+
+def _period_key(iso: str, agg: str) -> str:
+    """Etiqueta del período de una fecha ISO: '2024-03' (M), '2024' (Y), lunes ISO (W)."""
+    if agg == "M":
+        return iso[:7]
+    if agg == "Y":
+        return iso[:4]
+    d = date.fromisoformat(iso)
+    return (d - timedelta(days=d.weekday())).isoformat()
+
+
+class Snapshot(NamedTuple):
+    """Una carga completa del índice; se reemplaza entera, nunca se modifica."""
+    dates: list[str]
+    values: list[float]
+    spans: dict[tuple[str, str], tuple[int, int]]
+
+
+class SeriesIndex:
+    """Fechas y valores de todos los datasets, ordenados por (metric, series, date).
+
+    `spans[(metric, series)]` da el rango [lo, hi) de cada serie en los arreglos planos;
+    dentro de él las fechas ISO están ordenadas, así que from/to se resuelven con bisect.
+    Una recarga publica un `Snapshot` nuevo con una sola asignación y cada consulta lee
+    `self.snapshot` una vez, así que nunca mezcla `spans` nuevos con fechas viejas.
+    """
+
+    def __init__(self, paths=DATASETS):
+        self.paths = [Path(p) for p in paths]
+        self._lock = threading.Lock()
+        self._stamp = None
+        self.snapshot = Snapshot([], [], {})
+
+    def _current_stamp(self):
+        return tuple((str(p), p.stat().st_mtime_ns) if p.exists() else (str(p), None) for p in self.paths)
+
+    def refresh(self) -> None:
+        """Recarga si algún CSV cambió desde la última carga."""
+        stamp = self._current_stamp()
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            if stamp == self._stamp:
+                return
+            rows = []
+            for path in self.paths:
+                if not path.exists():
+                    continue
+                with open(path, newline="", encoding="utf-8") as f:
+                    for r in csv.DictReader(f):
+                        try:
+                            rows.append((r["metric"], r["series"], r["date"], float(r["value"])))
+                        except (KeyError, ValueError):
+                            continue
+            rows.sort(key=lambda r: (r[0], r[1], r[2]))
+
+            spans = {}
+            for i, r in enumerate(rows):
+                key = (r[0], r[1])
+                lo, _ = spans.get(key, (i, i))
+                spans[key] = (lo, i + 1)
+            self.snapshot = Snapshot([r[2] for r in rows], [r[3] for r in rows], spans)
+            self._stamp = stamp
+            print(f"  Índice cargado: {len(rows)} filas, {len(spans)} series")
+
+    def catalog(self) -> list[dict]:
+        snap = self.snapshot
+        return [
+            {"metric": m, "series": s, "from": snap.dates[lo], "to": snap.dates[hi - 1], "rows": hi - lo}
+            for (m, s), (lo, hi) in sorted(snap.spans.items())
+        ]
+
+    def window(self, metric: str, series: str, start: str | None, end: str | None) -> tuple[list[str], list[float]]:
+        """Fechas y valores de la serie con start <= date <= end (ISO, inclusivos)."""
+        snap = self.snapshot
+        span = snap.spans.get((metric, series))
+        if span is None:
+            raise KeyError(f"serie desconocida: {metric} / {series}")
+        lo, hi = span
+        i = bisect.bisect_left(snap.dates, start, lo, hi) if start else lo
+        j = bisect.bisect_right(snap.dates, end, lo, hi) if end else hi
+        return snap.dates[i:j], snap.values[i:j]
+
+
+def aggregate(dates: list[str], values: list[float], agg: str, how: str) -> tuple[list[str], list[float]]:
+    if agg == "D":
+        return dates, values
+    fn = AGG_FUNCS[how]
+    out_dates, out_values = [], []
+    for period, group in groupby(zip(dates, values), key=lambda dv: _period_key(dv[0], agg)):
+        out_dates.append(period)
+        out_values.append(fn([v for _, v in group]))
+    return out_dates, out_values
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "QueryServer"
+
+    def do_GET(self) -> None:
+        t0 = time.perf_counter()
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        index = self.server.index
+        index.refresh()
+
+        if url.path == "/catalog":
+            self._send_json(200, {"series": index.catalog()}, t0)
+            return
+        if url.path != "/series":
+            self._send_json(404, {"error": "rutas: /series, /catalog"}, t0)
+            return
+
+        metric, series = query.get("metric"), query.get("series")
+        agg = query.get("agg", "D").upper()
+        fmt = query.get("format", "json").lower()
+        how = query.get("how") or ("sum" if metric and metric.startswith("Energ") else "mean")
+        if not metric or not series:
+            self._send_json(400, {"error": "faltan parámetros: metric y series"}, t0)
+            return
+        if agg not in AGG_PERIODS or how not in AGG_FUNCS or fmt not in ("json", "csv"):
+            self._send_json(400, {"error": f"agg∈{AGG_PERIODS}, how∈{tuple(AGG_FUNCS)}, format∈(json, csv)"}, t0)
+            return
+        try:
+            dates, values = index.window(metric, series, query.get("from"), query.get("to"))
+        except KeyError as exc:
+            self._send_json(404, {"error": str(exc.args[0])}, t0)
+            return
+        dates, values = aggregate(dates, values, agg, how)
+
+        if fmt == "csv":
+            buf = io.StringIO()
+            buf.write("date,value\n")
+            buf.writelines(f"{d},{v!r}\n" for d, v in zip(dates, values))
+            self._send(200, buf.getvalue().encode("utf-8"), "text/csv; charset=utf-8", t0)
+            return
+        self._send_json(200, {
+            "metric": metric,
+            "series": series,
+            "from": query.get("from"),
+            "to": query.get("to"),
+            "agg": agg,
+            "how": None if agg == "D" else how,
+            "count": len(dates),
+            "dates": dates,
+            "values": values,
+        }, t0)
+
+    def _send_json(self, status: int, payload: dict, t0: float) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self._send(status, body, "application/json; charset=utf-8", t0)
+
+    def _send(self, status: int, body: bytes, content_type: str, t0: float) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("X-Query-Time-Ms", f"{(time.perf_counter() - t0) * 1000:.3f}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            print(f"  {self.address_string()} - {format % args}")
+
+
+class QueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, index: SeriesIndex, quiet: bool = False):
+        super().__init__(address, QueryHandler)
+        self.index = index
+        self.quiet = quiet
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Consultas por serie sobre los datasets largos.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--quiet", action="store_true", help="Sin log por consulta")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    index = SeriesIndex()
+    index.refresh()
+    server = QueryServer((args.host, args.port), index, quiet=args.quiet)
+    print(f"Consultas en: http://{args.host}:{args.port}/series?metric=...&series=...")
+    print("Presiona Ctrl+C para detener.\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nServidor detenido.")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
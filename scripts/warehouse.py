@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Almacén SQLite opcional con los datos diarios de producción, hidrología y caudales CCS.
+
+Tablas (una fila por día, clave primaria = fecha ISO, así que cada consulta por rango
+usa el índice de la clave):
+
+    produccion     fecha, fecha_raw, valores_raw, EnergiaCsr, EnergiaMol, EnergiaMaz, EnergiaSop, EnergiaMsf
+    hidrologia     fecha, fecha_raw, valores_raw, CaudalCuencaPaute, CaudalMol, CotaMol, ..., CotaMsf
+    ccs_caudales   fecha, coca, css, frente, frente_texto, balance, status, source, remote_path
+    archivos       tabla, mes, formato, columnas
+
+`fecha_raw` y `valores_raw` guardan el texto original de la fila en los CSV mensuales
+("30/09/2025 00:00:00" y "100.1777625,2153,..."), y `archivos` el formato y las
+columnas de cada archivo importado, para que `export` los reescriba byte a byte. Las filas que llegan
+desde download_data.py (--sqlite) se exportan como las escribe save_rows_to_csv.
+
+Los CSV de Produ_mensual/, Hidro_mensual/ y CCS/outputs/ siguen siendo la fuente
+versionada; este almacén se llena con `import`, se actualiza desde download_data.py
+(--sqlite) y lo puede leer build_datasets.py (--sqlite).
+
+Uso:
+    python scripts/warehouse.py import              # CSV mensuales + CCS -> celec.sqlite
+    python scripts/warehouse.py export --out-dir /tmp/celec   # celec.sqlite -> layout mensual
+    python scripts/warehouse.py stats
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_DB = REPO_ROOT / "celec.sqlite"
+PROD_DIR = REPO_ROOT / "Produ_mensual"
+HIDRO_DIR = REPO_ROOT / "Hidro_mensual"
+CCS_FLOWS_CSV = REPO_ROOT / "CCS" / "outputs" / "celec_daily_flows.csv"
+
+# Columnas de valores en el mismo orden que los CSV mensuales
+COLUMNS = {
+    "prod": ["EnergiaCsr", "EnergiaMol", "EnergiaMaz", "EnergiaSop", "EnergiaMsf"],
+    "hidro": ["CaudalCuencaPaute", "CaudalMol", "CotaMol", "CaudalMaz", "CotaMaz",
+              "CaudalSop", "CotaSop", "CaudalMsf", "CotaMsf"],
+}
+TABLES = {"prod": "produccion", "hidro": "hidrologia"}
+CCS_NUMERIC = {
+    "coca": "caudal_rio_coca_m3s",
+    "css": "caudal_derivado_css_m3s",
+    "frente": "caudal_frente_erosion_m3s",
+    "frente_texto": "frente_erosion_texto_m3s",
+    "balance": "balance_error_m3s",
+}
+CCS_TEXT = {"status": "status", "source": "source", "remote_path": "remote_path"}
+
+# Formatos de CSV mensual: "pandas" es el de download_data.save_rows_to_csv (todo entre
+# comillas, sin BOM); "origen" el de los archivos descargados a mano del portal (BOM,
+# encabezado sin comillas, solo la fecha entre comillas).
+FORMATO_PANDAS = "pandas"
+FORMATO_ORIGEN = "origen"
+
+
+def _decimal(v) -> float | None:
+    """'213,80' / '1.234,5' / '213.8' -> float (None si vacío o inválido)."""
+    if v is None or (isinstance(v, float) and pd.isna(v)):
+        return None
+    s = str(v).strip()
+    if not s:
+        return None
+    s = s.replace(".", "").replace(",", ".") if s.count(",") == 1 and s.count(".") <= 1 else s.replace(",", ".")
+    try:
+        x = float(s)
+    except ValueError:
+        return None
+    return None if pd.isna(x) else x
+
+
+def _read_monthly_csv(path: Path) -> pd.DataFrame:
+    """Todas las columnas como texto, tal cual están en el archivo (los valores se convierten en upsert)."""
+    raw = path.read_bytes()
+    if raw.startswith(b"\xef\xbb\xbf"):
+        raw = raw[3:]
+    for enc in ("utf-8", "cp1252", "latin-1"):
+        try:
+            text = raw.decode(enc)
+            break
+        except UnicodeDecodeError:
+            continue
+    df = pd.read_csv(io.StringIO(text), dtype=str, keep_default_na=False)
+    df.columns = [str(c).strip() for c in df.columns]
+    return df
+
+
+def _csv_format(path: Path) -> str:
+    head = path.read_bytes()[:512]
+    if head.startswith(b"\xef\xbb\xbf") and not head[3:].startswith(b'"'):
+        return FORMATO_ORIGEN
+    return FORMATO_PANDAS
+
+
+def _number(v) -> float | None:
+    """Valor de una celda: texto del CSV ('2153', '' = vacío) o número ya convertido."""
+    if isinstance(v, str):
+        return float(v) if v.strip() else None
+    return None if v is None or pd.isna(v) else float(v)
+
+
+class Warehouse:
+    def __init__(self, path: Path = DEFAULT_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create()
+
+    def _create(self) -> None:
+        for category, table in TABLES.items():
+            cols = ", ".join(f"{c} REAL" for c in COLUMNS[category])
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                f"(fecha TEXT PRIMARY KEY, fecha_raw TEXT, valores_raw TEXT, {cols}) WITHOUT ROWID"
+            )
+            # Bases creadas antes de valores_raw
+            existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            if "valores_raw" not in existing:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN valores_raw TEXT")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS archivos "
+            "(tabla TEXT, mes TEXT, formato TEXT, columnas TEXT, PRIMARY KEY (tabla, mes)) WITHOUT ROWID"
+        )
+        numeric = ", ".join(f"{c} REAL" for c in CCS_NUMERIC)
+        text = ", ".join(f"{c} TEXT" for c in CCS_TEXT)
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS ccs_caudales (fecha TEXT PRIMARY KEY, {numeric}, {text}) WITHOUT ROWID"
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ---- Escritura ----
+    def upsert(self, category: str, df: pd.DataFrame, formato: str | None = None) -> int:
+        """Inserta/actualiza filas con columna Fecha (dd/mm/aaaa ...). Un NaN no pisa un valor guardado.
+
+        Con `formato` (import de un CSV leído como texto) se guarda el texto original de
+        los valores, el formato y las columnas del archivo. Sin él (filas de download_data.py)
+        el mes queda con el formato de save_rows_to_csv, que es como se reescribe el CSV.
+        """
+        cols = COLUMNS[category]
+        table = TABLES[category]
+        present = [c for c in cols if c in df.columns]
+        fechas = pd.to_datetime(df["Fecha"], dayfirst=True, errors="coerce")
+        rows = []
+        for fecha, (_, r) in zip(fechas, df.iterrows()):
+            if pd.isna(fecha):
+                continue
+            values = [_number(r[c]) if c in r else None for c in cols]
+            raw = ",".join(r[c].strip() for c in present) if formato is not None else None
+            rows.append([fecha.date().isoformat(), str(r["Fecha"]).strip(), raw, *values])
+        placeholders = ", ".join("?" for _ in range(len(cols) + 3))
+        updates = ", ".join(f"{c} = COALESCE(excluded.{c}, {table}.{c})" for c in cols)
+        months = sorted({row[0][:7] for row in rows})
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO {table} (fecha, fecha_raw, valores_raw, {', '.join(cols)}) VALUES ({placeholders}) "
+                f"ON CONFLICT(fecha) DO UPDATE SET fecha_raw = excluded.fecha_raw, "
+                f"valores_raw = excluded.valores_raw, {updates}",
+                rows,
+            )
+            if formato is None:
+                self.conn.executemany("DELETE FROM archivos WHERE tabla = ? AND mes = ?",
+                                      [(table, m) for m in months])
+            else:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO archivos (tabla, mes, formato, columnas) VALUES (?, ?, ?, ?)",
+                    [(table, m, formato, ",".join(present)) for m in months])
+        return len(rows)
+
+    def upsert_ccs(self, df: pd.DataFrame) -> int:
+        """Filas de CCS/outputs/celec_daily_flows.csv (decimales con coma); gana la última por fecha."""
+        rows = {}
+        for _, r in df.iterrows():
+            fecha = str(r.get("fecha", "")).strip()
+            if not fecha or fecha == "nan":
+                continue
+            rows[fecha] = [fecha, *(_decimal(r.get(src)) for src in CCS_NUMERIC.values()),
+                           *("" if pd.isna(r.get(src)) else str(r.get(src)).strip() for src in CCS_TEXT.values())]
+        cols = ["fecha", *CCS_NUMERIC, *CCS_TEXT]
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO ccs_caudales ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+                list(rows.values()),
+            )
+        return len(rows)
+
+    def import_csvs(self, prod_dir: Path = PROD_DIR, hidro_dir: Path = HIDRO_DIR,
+                    ccs_csv: Path = CCS_FLOWS_CSV) -> dict:
+        counts = {}
+        for category, folder in (("prod", prod_dir), ("hidro", hidro_dir)):
+            counts[category] = sum(self.upsert(category, _read_monthly_csv(f), _csv_format(f))
+                                   for f in sorted(Path(folder).glob("*.csv")))
+        if Path(ccs_csv).exists():
+            counts["ccs"] = self.upsert_ccs(_read_monthly_csv(Path(ccs_csv)))
+        return counts
+
+    # ---- Lectura ----
+    def read_table(self, category: str, since: str | None = None, until: str | None = None) -> pd.DataFrame:
+        """Una consulta por rango sobre la clave: columnas Fecha (datetime) + valores, orden cronológico."""
+        cols = COLUMNS[category]
+        sql = f"SELECT fecha AS Fecha, {', '.join(cols)} FROM {TABLES[category]} WHERE fecha >= ? AND fecha <= ? ORDER BY fecha"
+        df = pd.read_sql_query(sql, self.conn, params=(since or "0000-00-00", until or "9999-99-99"))
+        df["Fecha"] = pd.to_datetime(df["Fecha"], format="%Y-%m-%d")
+        return df
+
+    def read_ccs(self) -> pd.DataFrame:
+        return pd.read_sql_query(
+            f"SELECT fecha, {', '.join(CCS_NUMERIC)}, {', '.join(CCS_TEXT)} FROM ccs_caudales ORDER BY fecha",
+            self.conn,
+        )
+
+    def stats(self) -> dict:
+        out = {}
+        for table in (*TABLES.values(), "ccs_caudales"):
+            n, lo, hi = self.conn.execute(f"SELECT COUNT(*), MIN(fecha), MAX(fecha) FROM {table}").fetchone()
+            out[table] = {"rows": n, "fecha_min": lo, "fecha_max": hi}
+        return out
+
+    # ---- Exportación al layout mensual ----
+    def export_monthly(self, out_dir: Path) -> list[Path]:
+        """Reescribe Produ_mensual/ e Hidro_mensual/ bajo `out_dir` como lo hace download_data.py."""
+        from download_data import get_monthly_filename  # import diferido: download_data importa este módulo
+
+        written = []
+        for category, folder in (("prod", "Produ_mensual"), ("hidro", "Hidro_mensual")):
+            cols = COLUMNS[category]
+            table = TABLES[category]
+            df = pd.read_sql_query(
+                f"SELECT fecha, fecha_raw, valores_raw, {', '.join(cols)} FROM {table} ORDER BY fecha", self.conn
+            )
+            files = {mes: (formato, columnas.split(",")) for mes, formato, columnas in self.conn.execute(
+                "SELECT mes, formato, columnas FROM archivos WHERE tabla = ?", (table,))}
+            df["Fecha"] = df["fecha_raw"].where(
+                df["fecha_raw"].notna(), pd.to_datetime(df["fecha"]).dt.strftime("%d/%m/%Y 00:00:00"))
+            # Texto de cada valor como lo escribe pandas (repr del float); se usa cuando no hay original
+            df[cols] = df[cols].apply(lambda col: col.map(lambda v: "" if pd.isna(v) else repr(float(v))))
+            for month, g in df.groupby(df["fecha"].str.slice(0, 7), sort=True):
+                path = Path(out_dir) / folder / get_monthly_filename(pd.Timestamp(f"{month}-01"), category)
+                formato, file_cols = files.get(month, (FORMATO_PANDAS, cols))
+                g = g.sort_values("Fecha", ascending=False)
+                if month in files:
+                    # Mes importado de un CSV: el texto original de cada fila en sus columnas
+                    raw = g["valores_raw"].str.split(",")
+                    ok = raw.map(lambda t: isinstance(t, list) and len(t) == len(file_cols))
+                    original = pd.DataFrame(raw[ok].tolist(), index=g.index[ok], columns=file_cols)
+                    g.loc[ok, file_cols] = original
+                g = g[["Fecha", *file_cols]]
+                if formato == FORMATO_ORIGEN:
+                    _write_origin_csv_atomic(path, g)
+                else:
+                    _write_csv_atomic(path, g)
+                written.append(path)
+        return written
+
+
+def _write_atomic(path: Path, write, encoding: str = "utf-8") -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding=encoding, newline="") as f:
+            write(f)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def _write_csv_atomic(path: Path, df: pd.DataFrame) -> None:
+    # Mismo formato que download_data.save_rows_to_csv (utf-8, todo entre comillas)
+    _write_atomic(path, lambda f: df.to_csv(f, index=False, quoting=1))
+
+
+def _write_origin_csv_atomic(path: Path, df: pd.DataFrame) -> None:
+    # Formato de los archivos del portal: BOM, encabezado sin comillas, fecha entre comillas
+    def write(f):
+        f.write(",".join(df.columns) + "\n")
+        for row in df.itertuples(index=False):
+            f.write(f'"{row[0]}",' + ",".join(row[1:]) + "\n")
+
+    _write_atomic(path, write, encoding="utf-8-sig")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Almacén SQLite de datos diarios CELEC.")
+    parser.add_argument("command", choices=["import", "export", "stats"])
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB, help=f"Base SQLite (default: {DEFAULT_DB.name})")
+    parser.add_argument("--out-dir", type=Path, default=REPO_ROOT,
+                        help="export: carpeta donde escribir Produ_mensual/ e Hidro_mensual/")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    wh = Warehouse(args.db)
+    try:
+        if args.command == "import":
+            counts = wh.import_csvs()
+            print(f"Importado en {args.db}: {counts}")
+        elif args.command == "export":
+            written = wh.export_monthly(args.out_dir)
+            print(f"Exportados {len(written)} archivos mensuales en {args.out_dir}")
+        for table, s in wh.stats().items():
+            print(f"  {table:<13} {s['rows']:6d} filas  {s['fecha_min']} → {s['fecha_max']}")
+    finally:
+        wh.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
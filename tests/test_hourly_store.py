@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""Horas del almacén horario: una sola zona (hora local de Ecuador) y día de la API."""
+
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from download_data import _hourly_points, _item_day, _item_timestamp  # noqa: E402
+from hourly_store import HourlyAccumulator, aggregate_hourly, read_hourly  # noqa: E402
+
+
+@pytest.mark.parametrize("item", [
+    {"fecha": "30/09/2025 20:00:00"},
+    {"timestamp": "2025-10-01T01:00:00Z"},
+    {"timestamp": "2025-09-30T20:00:00-05:00"},
+])
+def test_timestamps_are_local_whatever_the_format(item):
+    assert _item_timestamp(item) == datetime(2025, 9, 30, 20)
+    assert _item_day(item) == date(2025, 9, 30)
+
+
+def test_late_hours_stay_in_their_api_day_and_month(tmp_path):
+    items = [
+        {"fecha": "30/09/2025 19:00:00", "valueedit": 1.0},
+        {"timestamp": "2025-10-01T04:00:00Z", "valueedit": 2.0},     # 23:00 local del 30
+        {"timestamp": "2025-10-01T00:30:00-05:00", "valueedit": 3.0},  # aún día API del 30
+        {"fecha": "01/10/2025 01:00:00", "valueedit": 10.0},          # primer punto del 1
+    ]
+    acc = HourlyAccumulator(tmp_path)
+    acc.add("prod", "EnergiaMol", _hourly_points(items))
+    written = acc.flush()
+    assert sorted(p.name for p in written) == ["2025-09.npz", "2025-10.npz"]
+
+    hourly = read_hourly(tmp_path, "prod")
+    assert hourly.index[0] == datetime(2025, 9, 30, 19)
+    daily = aggregate_hourly("prod", "D", root=tmp_path)["EnergiaMol"]
+    assert daily.to_dict() == {datetime(2025, 9, 30): 6.0, datetime(2025, 10, 1): 10.0}
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""Regla de días asentados de download_data.ResponseCache."""
+
+import json
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from download_data import ResponseCache, request_key  # noqa: E402
+
+KEY = request_key("sardomcsr/pointValues", {"mrid": "x", "fecha": "01/01/2025 00:00:00"})
+
+
+def _backdate(cache, key, fetched_at):
+    path = cache._path(key)
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    payload["fetched_at"] = fetched_at.isoformat()
+    path.write_text(json.dumps(payload), encoding="utf-8")
+
+
+def test_payload_fetched_before_settling_is_refetched(tmp_path):
+    cache = ResponseCache(tmp_path, settled_days=3)
+    day = date.today() - timedelta(days=10)
+    cache.put(KEY, day, [{"valueedit": 1.0}])
+    # Se pidió el mismo día (dato parcial): aunque el día ya está asentado, no es definitivo
+    _backdate(cache, KEY, datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc) + timedelta(hours=12))
+    assert cache.is_settled(day)
+    assert cache.get(KEY, day) is None
+
+    # Al volver a pedirlo se sobrescribe con fetched_at actual y pasa a servirse desde la caché
+    cache.put(KEY, day, [{"valueedit": 2.0}])
+    assert cache.get(KEY, day) == [{"valueedit": 2.0}]
+
+
+def test_payload_fetched_after_settling_is_served(tmp_path):
+    cache = ResponseCache(tmp_path, settled_days=3)
+    day = date.today() - timedelta(days=10)
+    cache.put(KEY, day, [{"valueedit": 1.0}])
+    _backdate(cache, KEY, datetime.now(timezone.utc) - timedelta(days=6))
+    assert cache.get(KEY, day) == [{"valueedit": 1.0}]
+
+
+def test_recent_day_is_never_served_and_offline_serves_everything(tmp_path):
+    day = date.today()
+    ResponseCache(tmp_path, settled_days=3).put(KEY, day, [{"valueedit": 1.0}])
+    assert ResponseCache(tmp_path, settled_days=3).get(KEY, day) is None
+    assert ResponseCache(tmp_path, settled_days=3, offline=True).get(KEY, day) == [{"valueedit": 1.0}]
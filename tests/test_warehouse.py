@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Import → export del almacén SQLite: los CSV mensuales vuelven byte a byte."""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import download_data  # noqa: E402
+from warehouse import Warehouse  # noqa: E402
+
+FOLDERS = ("Produ_mensual", "Hidro_mensual")
+
+
+def _monthly_files(root):
+    return sorted(p.relative_to(root) for folder in FOLDERS for p in (root / folder).glob("*.csv"))
+
+
+def test_export_reproduces_repo_monthly_csvs(tmp_path):
+    wh = Warehouse(tmp_path / "celec.sqlite")
+    try:
+        wh.import_csvs(REPO_ROOT / "Produ_mensual", REPO_ROOT / "Hidro_mensual", tmp_path / "sin_ccs.csv")
+        wh.export_monthly(tmp_path / "out")
+    finally:
+        wh.close()
+
+    files = _monthly_files(REPO_ROOT)
+    assert files and _monthly_files(tmp_path / "out") == files
+    changed = [str(f) for f in files if (tmp_path / "out" / f).read_bytes() != (REPO_ROOT / f).read_bytes()]
+    assert changed == []
+
+
+def test_export_matches_save_rows_to_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    wh = Warehouse(tmp_path / "celec.sqlite")
+    monkeypatch.setattr(download_data, "_warehouse", wh)
+    rows = [
+        {"Fecha": "29/04/2020 00:00:00", "CaudalCuencaPaute": 97.05995833333333, "CaudalMol": 96.33333333333333},
+        {"Fecha": "30/04/2020 00:00:00", "CaudalCuencaPaute": 100.1777625, "CaudalSop": 113.25274865416667},
+    ]
+    try:
+        download_data.save_rows_to_csv(rows, "hidro", datetime(2020, 4, 1))
+        wh.export_monthly(tmp_path / "out")
+    finally:
+        wh.close()
+
+    written = _monthly_files(tmp_path)
+    assert len(written) == 1
+    assert (tmp_path / "out" / written[0]).read_bytes() == (tmp_path / written[0]).read_bytes()
+
+
+@pytest.mark.parametrize("value", ["2153", "0.000005", "113.25274865416667"])
+def test_import_keeps_value_text(tmp_path, value):
+    src = tmp_path / "src" / "Hidro_mensual"
+    src.mkdir(parents=True)
+    name = download_data.get_monthly_filename(datetime(2021, 10, 1), "hidro")
+    (src / name).write_bytes(
+        "\ufeffFecha,CaudalCuencaPaute,CotaMaz\n"
+        f'"01/10/2021 00:00:00",{value},2153.06\n'.encode("utf-8")
+    )
+    wh = Warehouse(tmp_path / "celec.sqlite")
+    try:
+        wh.import_csvs(tmp_path / "src" / "Produ_mensual", src, tmp_path / "sin_ccs.csv")
+        assert wh.read_table("hidro")["CaudalCuencaPaute"].iloc[0] == float(value)
+        wh.export_monthly(tmp_path / "out")
+    finally:
+        wh.close()
+    assert (tmp_path / "out" / "Hidro_mensual" / name).read_bytes() == (src / name).read_bytes()